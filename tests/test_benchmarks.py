@@ -0,0 +1,189 @@
+"""Микробенчмарки горячих путей с порогом регрессии.
+
+Запуск: RUN_BENCHMARKS=1 pytest tests/test_benchmarks.py
+
+Раунды замера чередуются с раундами калибровочного цикла на чистом
+Python, замер — медиана отношений соседних раундов. Поэтому базовые
+значения в benchmarks.json переносимы между машинами, а шумный раунд
+ничего не решает.
+
+Тест падает, если замер медленнее базы больше чем на
+BENCHMARK_THRESHOLD процентов (по умолчанию 25). BENCHMARK_UPDATE=1
+перезаписывает базу текущими значениями; замеры, которых в базе ещё
+нет, записываются всегда. Изменение, которое намеренно замедляет
+путь, обновляет базу в том же коммите.
+"""
+import json
+import os
+import statistics
+import time
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.template import Context, Template
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        not os.environ.get('RUN_BENCHMARKS'),
+        reason='Бенчмарки запускаются с RUN_BENCHMARKS=1',
+    ),
+]
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'benchmarks.json')
+THRESHOLD = float(os.environ.get('BENCHMARK_THRESHOLD', 25))
+UPDATE = bool(os.environ.get('BENCHMARK_UPDATE'))
+ROUNDS = 9
+MIN_ROUND_TIME = 0.05
+
+
+def timed(func, number):
+    started = time.perf_counter()
+    for _ in range(number):
+        func()
+    return time.perf_counter() - started
+
+
+def calls_per_round(func):
+    """Сколько вызовов занимают не меньше MIN_ROUND_TIME секунд."""
+    number = 1
+    while timed(func, number) < MIN_ROUND_TIME:
+        number *= 2
+    return number
+
+
+def calibration_loop():
+    total = 0
+    for i in range(10_000):
+        total += i * i % 7
+    return total
+
+
+@pytest.fixture(scope='module')
+def baseline():
+    try:
+        with open(BASELINE_PATH, encoding='utf-8') as source:
+            stored = json.load(source)
+    except FileNotFoundError:
+        stored = {}
+    current = dict(stored)
+    yield current
+    if current != stored:
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as target:
+            json.dump(current, target, indent=2, sort_keys=True)
+            target.write('\n')
+
+
+def relative_time(func):
+    """Время вызова func в единицах калибровочного цикла.
+
+    Раунды замера чередуются с раундами калибровки, и берётся медиана
+    отношений соседних раундов: ни шумный раунд, ни дрейф скорости
+    машины за время прогона на результат почти не влияют.
+    """
+    number = calls_per_round(func)
+    unit_number = calls_per_round(calibration_loop)
+    ratios = []
+    for _ in range(ROUNDS):
+        elapsed = timed(func, number) / number
+        unit = timed(calibration_loop, unit_number) / unit_number
+        ratios.append(elapsed / unit)
+    return statistics.median(ratios)
+
+
+@pytest.fixture
+def benchmark(baseline):
+    def run(name, func):
+        score = relative_time(func)
+        expected = baseline.get(name)
+        if expected is None or UPDATE:
+            baseline[name] = round(score, 4)
+            return score
+        limit = expected * (1 + THRESHOLD / 100)
+        assert score <= limit, (
+            f'Бенчмарк `{name}` замедлился: {score:.4f} против '
+            f'{expected:.4f} в базе (порог {THRESHOLD:.0f}%)'
+        )
+        return score
+    return run
+
+
+@pytest.fixture
+def many_posts(mixer, user, group):
+    from posts.models import Post
+    mixer.cycle(300).blend(Post, author=user, group=group)
+    cache.clear()
+
+
+def anonymous_request(path='/'):
+    request = RequestFactory().get(path)
+    request.user = AnonymousUser()
+    return request
+
+
+@pytest.mark.parametrize('page', [1, 15, 30])
+def test_paginator_method(benchmark, many_posts, page):
+    from posts.models import Post
+    from posts.utils import FEED_INDEX, paginator_method
+    posts = Post.objects.select_related('author', 'group')
+    request = anonymous_request(f'/?page={page}')
+
+    def paginate():
+        page_obj = paginator_method(request, posts, 10, FEED_INDEX)
+        list(page_obj)
+
+    benchmark(f'paginator_method_page_{page}', paginate)
+
+
+def test_render_index(benchmark, many_posts):
+    from posts.models import Post
+    from posts.utils import FEED_INDEX, paginator_method
+    request = anonymous_request()
+    page_obj = paginator_method(
+        request, Post.objects.select_related('author', 'group'), 10,
+        FEED_INDEX,
+    )
+    page_obj.object_list = list(page_obj.object_list)
+    context = {'page_obj': page_obj}
+
+    benchmark(
+        'render_index',
+        lambda: render_to_string('posts/index.html', context, request),
+    )
+
+
+def test_post_form_validation(benchmark, group):
+    from posts.forms import PostForm
+    data = {'text': 'Тестовый пост ' * 20, 'group': group.pk}
+
+    def validate():
+        assert PostForm(data).is_valid()
+
+    benchmark('post_form_validation', validate)
+
+
+def test_post_save(benchmark, user, group):
+    from posts.models import Post
+
+    def save():
+        Post(text='Тестовый пост', author=user, group=group).save()
+
+    benchmark('post_save', save)
+
+
+def test_year_context_processor(benchmark):
+    from core.context_processors.year import year
+    request = anonymous_request()
+    benchmark('year_context_processor', lambda: year(request))
+
+
+def test_addclass_filter(benchmark):
+    from posts.forms import PostForm
+    template = Template(
+        '{% load user_filters %}{{ form.text|addclass:"form-control" }}'
+    )
+    context = Context({'form': PostForm()})
+    benchmark('addclass_filter', lambda: template.render(context))
@@ -0,0 +1,22 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'attempts', 'run_at', 'created')
+    list_filter = ('status', 'name')
+    readonly_fields = ('locked_by', 'last_error', 'created')
+    actions = ('retry',)
+
+    def retry(self, request, queryset):
+        retried = queryset.update(
+            status=Task.QUEUED, attempts=0, locked_by='',
+            run_at=timezone.now(),
+        )
+        self.message_user(request, f'Возвращено в очередь: {retried}.')
+    retry.short_description = 'Повторить сейчас'
+
+
+admin.site.register(Task, TaskAdmin)
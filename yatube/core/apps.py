@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+
+        # Задачи очереди регистрируются при импорте модулей tasks.
+        autodiscover_modules('tasks')
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Кэши, которые видит только один процесс.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Кэш по умолчанию должен быть общим для всех процессов.
+
+    Версию кэша страниц сдвигает процесс, который записал пост.
+    Остальные процессы с кэшем в памяти отдавали бы старые страницы.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Error(
+        f'Кэш по умолчанию {backend} не общий для процессов.',
+        hint='Укажите в CACHES файловый кэш или memcached.',
+        id='core.E001',
+    )]
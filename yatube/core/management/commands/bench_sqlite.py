@@ -0,0 +1,120 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite на смеси чтений '
+        'и записей с настройками по умолчанию и с SQLITE_PRAGMAS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50_000)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--duration', type=float, default=5.0,
+            help='Сколько секунд длится каждый прогон.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.options = options
+        for title, pragmas in (
+            ('По умолчанию', {}),
+            ('SQLITE_PRAGMAS', settings.SQLITE_PRAGMAS),
+        ):
+            directory = tempfile.mkdtemp()
+            path = os.path.join(directory, 'bench_sqlite.sqlite3')
+            try:
+                self.fill(path, pragmas)
+                result = self.run(path, pragmas)
+            finally:
+                for name in os.listdir(directory):
+                    os.remove(os.path.join(directory, name))
+                os.rmdir(directory)
+            seconds = options['duration']
+            self.stdout.write(
+                f'{title}: чтений {result["reads"] / seconds:.0f}/с, '
+                f'записей {result["writes"] / seconds:.0f}/с, '
+                f'ошибок блокировки {result["locked"]}'
+            )
+
+    def connect(self, path, pragmas):
+        # Как Django: модуль sqlite3 с таймаутом по умолчанию.
+        db = sqlite3.connect(path, check_same_thread=False)
+        for name, value in pragmas.items():
+            db.execute(f'PRAGMA {name} = {value}')
+        return db
+
+    def fill(self, path, pragmas):
+        db = self.connect(path, pragmas)
+        db.execute(
+            'CREATE TABLE posts_post (id integer PRIMARY KEY, '
+            'text text, pub_date real, author_id integer)'
+        )
+        db.execute('CREATE INDEX post_pub_date ON posts_post (pub_date)')
+        rnd = random.Random(self.options['seed'])
+        db.executemany(
+            'INSERT INTO posts_post (text, pub_date, author_id) '
+            'VALUES (?, ?, ?)',
+            (
+                ('x' * rnd.randint(50, 500), i, rnd.randint(1, 1000))
+                for i in range(self.options['rows'])
+            ),
+        )
+        db.commit()
+        db.close()
+
+    def run(self, path, pragmas):
+        result = {'reads': 0, 'writes': 0, 'locked': 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + self.options['duration']
+
+        def worker(number, write):
+            rnd = random.Random(self.options['seed'] + number)
+            db = self.connect(path, pragmas)
+            done = locked = 0
+            while time.monotonic() < deadline:
+                try:
+                    if write:
+                        db.execute(
+                            'INSERT INTO posts_post '
+                            '(text, pub_date, author_id) VALUES (?, ?, ?)',
+                            ('новый пост', time.time(), rnd.randint(1, 1000)),
+                        )
+                        db.commit()
+                    else:
+                        db.execute(
+                            'SELECT id, text FROM posts_post '
+                            'ORDER BY pub_date DESC LIMIT 10 OFFSET ?',
+                            (rnd.randint(0, 1000),),
+                        ).fetchall()
+                    done += 1
+                except sqlite3.OperationalError:
+                    db.rollback()
+                    locked += 1
+            db.close()
+            with lock:
+                result['writes' if write else 'reads'] += done
+                result['locked'] += locked
+
+        threads = [
+            threading.Thread(target=worker, args=(number, write))
+            for number, write in enumerate(
+                [False] * self.options['readers']
+                + [True] * self.options['writers']
+            )
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return result
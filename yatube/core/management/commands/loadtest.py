@@ -0,0 +1,271 @@
+import http.client
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, get_user_model)
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLResolver, get_resolver, reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from django.utils.module_loading import import_string
+
+from core.utils import percentile
+from posts.models import Group, Post
+
+User = get_user_model()
+
+NAMESPACES = ('posts', 'users', 'about')
+# Выход завершает сессию, поэтому его гоняем последним.
+LAST = ('users:logout',)
+
+
+def named_urls():
+    """Все именованные маршруты из NAMESPACES: (имя, параметры пути)."""
+    for resolver in get_resolver().url_patterns:
+        if not isinstance(resolver, URLResolver):
+            continue
+        if resolver.namespace not in NAMESPACES:
+            continue
+        for pattern in resolver.url_patterns:
+            if pattern.name:
+                yield (
+                    f'{resolver.namespace}:{pattern.name}',
+                    tuple(pattern.pattern.converters),
+                )
+
+
+def compare(results, baseline, threshold):
+    """Регрессии относительно базового прогона: p95 и число запросов."""
+    regressions = []
+    for view, current in results['views'].items():
+        previous = baseline.get('views', {}).get(view)
+        if previous is None:
+            continue
+        limit = previous['latency_ms']['p95'] * (1 + threshold / 100)
+        if current['latency_ms']['p95'] > limit:
+            regressions.append(
+                f'{view}: p95 {current["latency_ms"]["p95"]:.1f} мс '
+                f'против {previous["latency_ms"]["p95"]:.1f} мс'
+            )
+        if (current['queries'] or 0) > (previous['queries'] or 0):
+            regressions.append(
+                f'{view}: запросов к базе {current["queries"]} '
+                f'против {previous["queries"]}'
+            )
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон именованных адресов posts, users и about '
+        'против запущенного сервера: пропускная способность, '
+        'p50/p95/p99, число запросов к базе и размер ответа.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url', default='http://127.0.0.1:8000',
+            help='Адрес запущенного сервера.',
+        )
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Сколько запросов сделать до замера.',
+        )
+        parser.add_argument(
+            '--view', action='append', dest='views',
+            help='Гонять только этот адрес, например posts:index.',
+        )
+        parser.add_argument(
+            '--user',
+            help='Ходить от имени этого пользователя, а не анонимно.',
+        )
+        parser.add_argument('--output', help='Куда сохранить JSON.')
+        parser.add_argument(
+            '--baseline', help='JSON прошлого прогона для сравнения.',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=20.0,
+            help='Допустимый рост p95 относительно базы, в процентах.',
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        split = urlsplit(options['base_url'])
+        if split.scheme not in ('http', 'https') or not split.netloc:
+            raise CommandError(f'Неверный адрес {options["base_url"]}.')
+        self.split = split
+        self.local = threading.local()
+        self.user = None
+        self.cookie = ''
+        if options['user']:
+            self.user = User.objects.filter(
+                username=options['user'],
+            ).first()
+            if self.user is None:
+                raise CommandError(f'Нет пользователя {options["user"]}.')
+            self.cookie = self.session_cookie(self.user)
+
+        targets = self.targets()
+        if not targets:
+            raise CommandError('Нечего гонять: адреса не найдены.')
+        results = {
+            'base_url': options['base_url'],
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'user': options['user'],
+            'started': timezone.now().isoformat(),
+            'views': {},
+        }
+        for view, url in targets:
+            stats = self.run(url)
+            stats['url'] = url
+            stats['queries'] = self.count_queries(url)
+            results['views'][view] = stats
+            self.report(view, stats)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as source:
+                baseline = json.load(source)
+            regressions = compare(results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError(
+                    'Регрессии относительно базы:\n' + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
+
+    def session_cookie(self, user):
+        engine = import_string(f'{settings.SESSION_ENGINE}.SessionStore')
+        session = engine()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+    def url_kwargs(self):
+        """Значения параметров путей из базы: самые нагруженные объекты."""
+        author = self.user or User.objects.filter(
+            stats__isnull=False,
+        ).order_by('-stats__posts_count').first()
+        group = Group.objects.order_by('-posts_count').first()
+        posts = Post.objects.order_by('-pub_date', '-id')
+        if self.user is not None:
+            posts = posts.filter(author=self.user)
+        post = posts.first()
+        kwargs = {
+            'slug': group and group.slug,
+            'username': author and author.username,
+            'post_id': post and post.pk,
+        }
+        if author is not None:
+            kwargs['uidb64'] = urlsafe_base64_encode(force_bytes(author.pk))
+            kwargs['token'] = default_token_generator.make_token(author)
+        return kwargs
+
+    def targets(self):
+        values = self.url_kwargs()
+        targets = []
+        for view, params in named_urls():
+            if self.options['views'] and view not in self.options['views']:
+                continue
+            kwargs = {param: values.get(param) for param in params}
+            if None in kwargs.values():
+                self.stderr.write(f'{view}: нет данных для {params}, пропуск')
+                continue
+            targets.append((view, reverse(view, kwargs=kwargs)))
+        targets.sort(key=lambda target: target[0] in LAST)
+        return targets
+
+    def connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            factory = (
+                http.client.HTTPSConnection
+                if self.split.scheme == 'https'
+                else http.client.HTTPConnection
+            )
+            conn = self.local.conn = factory(self.split.netloc, timeout=30)
+        return conn
+
+    def fetch(self, url):
+        headers = {'Cookie': self.cookie} if self.cookie else {}
+        started = time.perf_counter()
+        try:
+            conn = self.connection()
+            conn.request('GET', url, headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException):
+            self.local.conn = None
+            return time.perf_counter() - started, 0, 0
+        if response.getheader('Connection', '').lower() == 'close':
+            conn.close()
+            self.local.conn = None
+        return time.perf_counter() - started, response.status, len(body)
+
+    def run(self, url):
+        total = self.options['requests']
+        with ThreadPoolExecutor(self.options['concurrency']) as pool:
+            list(pool.map(self.fetch, [url] * self.options['warmup']))
+            started = time.perf_counter()
+            samples = list(pool.map(self.fetch, [url] * total))
+            elapsed = time.perf_counter() - started
+        latencies = [seconds * 1000 for seconds, _, _ in samples]
+        statuses = Counter(status for _, status, _ in samples)
+        sizes = [size for _, status, size in samples if status]
+        return {
+            'requests': total,
+            'errors': sum(
+                count for status, count in statuses.items()
+                if not status or status >= 500
+            ),
+            'statuses': {str(status): n for status, n in statuses.items()},
+            'throughput_rps': total / elapsed if elapsed else 0.0,
+            'latency_ms': {
+                'mean': sum(latencies) / len(latencies) if latencies else 0,
+                'p50': percentile(latencies, 50),
+                'p95': percentile(latencies, 95),
+                'p99': percentile(latencies, 99),
+            },
+            'bytes': sum(sizes) // len(sizes) if sizes else 0,
+        }
+
+    def count_queries(self, url):
+        """Число запросов к базе на холодный рендер, внутри процесса.
+
+        Сервер может быть где угодно, поэтому запросы считаются
+        тестовым клиентом на той же базе, а не по ответу сервера.
+        """
+        client = Client()
+        if self.user is not None:
+            client.force_login(self.user)
+        with override_settings(PAGE_CACHE_ENABLED=False):
+            with CaptureQueriesContext(connection) as queries:
+                client.get(url)
+        return len(queries)
+
+    def report(self, view, stats):
+        latency = stats['latency_ms']
+        self.stdout.write(
+            f'{view:32} {stats["throughput_rps"]:8.1f} rps  '
+            f'p50 {latency["p50"]:7.1f}  p95 {latency["p95"]:7.1f}  '
+            f'p99 {latency["p99"]:7.1f} мс  '
+            f'запросов {stats["queries"]:3}  '
+            f'{stats["bytes"]} Б  ошибок {stats["errors"]}'
+        )
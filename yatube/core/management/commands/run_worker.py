@@ -0,0 +1,100 @@
+import logging
+import signal
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.queue import claim, run_claimed
+
+logger = logging.getLogger('core.queue')
+
+
+class Command(BaseCommand):
+    help = (
+        'Воркер очереди задач core.queue: берёт задачи из базы '
+        'и выполняет их в пуле потоков или процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pool', choices=('thread', 'process'), default='thread',
+            help='Потоки для задач-ожиданий (почта), процессы — для CPU.',
+        )
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--visibility-timeout', type=float,
+            help='Через сколько секунд невыполненная задача вернётся '
+                 'в очередь; по умолчанию TASK_VISIBILITY_TIMEOUT.',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float,
+            help='Пауза при пустой очереди; по умолчанию TASK_POLL_INTERVAL.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить всё, что уже готово, и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        if options['pool'] == 'process':
+            # Дочерние процессы не должны делить соединения с родителем.
+            connections.close_all()
+            pool = ProcessPoolExecutor(
+                options['concurrency'], initializer=django.setup,
+            )
+        else:
+            pool = ThreadPoolExecutor(
+                options['concurrency'], thread_name_prefix='worker',
+            )
+        poll_interval = (
+            options['poll_interval'] or settings.TASK_POLL_INTERVAL
+        )
+        self.done = self.failed = 0
+        running = set()
+        with pool:
+            while not self.stopping:
+                claimed = None
+                if len(running) < options['concurrency']:
+                    claimed = claim(options['visibility_timeout'])
+                if claimed is not None:
+                    running.add(pool.submit(run_claimed, *claimed))
+                    continue
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                finished, running = wait(
+                    running, poll_interval, return_when=FIRST_COMPLETED,
+                )
+                self.count(finished)
+            self.count(wait(running).done)
+        self.stdout.write(
+            f'Выполнено пачек: {self.done}, с ошибкой: {self.failed}.'
+        )
+
+    def count(self, futures):
+        for future in futures:
+            try:
+                succeeded = future.result()
+            except Exception:
+                # Упала не задача, а учёт её итога: задача вернётся
+                # в очередь по таймауту видимости.
+                logger.exception('Итог задачи не записан')
+                succeeded = False
+            if succeeded:
+                self.done += 1
+            else:
+                self.failed += 1
+
+    def stop(self, signum, frame):
+        # Доделываем взятые задачи и выходим; новые не берём.
+        self.stopping = True
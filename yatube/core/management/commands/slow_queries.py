@@ -0,0 +1,107 @@
+import json
+import os
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils import percentile
+
+SORT_KEYS = ('total', 'count', 'p95')
+
+
+def log_files(path):
+    """Файл лога и его ротированные копии, от старых к новым."""
+    rotated = []
+    number = 1
+    while os.path.exists(f'{path}.{number}'):
+        rotated.append(f'{path}.{number}')
+        number += 1
+    files = rotated[::-1]
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def read_records(paths):
+    for path in paths:
+        with open(path, encoding='utf-8') as source:
+            for line in source:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and 'fingerprint' in record:
+                    yield record
+
+
+def aggregate(records):
+    """Сводка по отпечаткам: число, суммарное время, p95 и представления."""
+    groups = defaultdict(lambda: {
+        'durations': [], 'total': 0, 'slowest': None,
+        'views': Counter(), 'sql': '', 'stack': [],
+    })
+    for record in records:
+        group = groups[record['fingerprint']]
+        duration = record['duration_ms']
+        group['durations'].append(duration)
+        group['total'] += duration
+        group['views'][record.get('view') or '-'] += 1
+        # Пример — самый медленный запрос с этим отпечатком.
+        if group['slowest'] is None or duration >= group['slowest']:
+            group['slowest'] = duration
+            group['sql'] = record.get('sql', '')
+            group['stack'] = record.get('stack', [])
+    return [
+        {
+            'fingerprint': fingerprint,
+            'count': len(group['durations']),
+            'total': group['total'],
+            # Единственная сортировка длительностей — здесь.
+            'p95': percentile(group['durations'], 95),
+            'views': group['views'].most_common(3),
+            'sql': group['sql'],
+            'stack': group['stack'],
+        }
+        for fingerprint, group in groups.items()
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка лога медленных запросов по нормализованному SQL: '
+        'сколько раз, суммарное время, p95 и откуда вызывались.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=settings.SLOW_QUERY_LOG,
+            help='Файл лога; ротированные копии читаются тоже.',
+        )
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--sort', choices=SORT_KEYS, default='total')
+        parser.add_argument(
+            '--stack', action='store_true',
+            help='Показывать стек самого медленного вызова.',
+        )
+
+    def handle(self, *args, **options):
+        paths = log_files(options['path'])
+        if not paths:
+            raise CommandError(f'Лог {options["path"]} не найден.')
+        rows = aggregate(read_records(paths))
+        rows.sort(key=lambda row: row[options['sort']], reverse=True)
+        for row in rows[:options['top']]:
+            views = ', '.join(f'{view} ×{n}' for view, n in row['views'])
+            self.stdout.write(
+                f'{row["count"]:6} раз  {row["total"]:10.1f} мс всего  '
+                f'p95 {row["p95"]:8.1f} мс  {views}'
+            )
+            self.stdout.write(f'    {row["fingerprint"]}')
+            if options['stack']:
+                for frame in row['stack']:
+                    self.stdout.write(f'        {frame}')
+        self.stdout.write(
+            f'Отпечатков: {len(rows)}, '
+            f'запросов: {sum(row["count"] for row in rows)}'
+        )
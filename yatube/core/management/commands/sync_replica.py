@@ -0,0 +1,70 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.routers import PRIMARY
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в реплики через backup API: '
+        'один раз или в цикле с заданным интервалом.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--replica', action='append', dest='replicas',
+            help='Псевдоним реплики; по умолчанию DATABASE_REPLICAS.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять каждые столько секунд; 0 — один раз.',
+        )
+        parser.add_argument(
+            '--pages', type=int, default=1024,
+            help='Страниц за шаг копирования: писатели ждут меньше.',
+        )
+        parser.add_argument('--source', help='Путь к основной базе.')
+        parser.add_argument('--target', help='Путь к реплике.')
+
+    def handle(self, *args, **options):
+        source = options['source'] or self.path(PRIMARY)
+        if options['target']:
+            targets = [options['target']]
+        else:
+            aliases = options['replicas'] or settings.DATABASE_REPLICAS
+            if not aliases:
+                raise CommandError('Реплики не настроены.')
+            targets = [self.path(alias) for alias in aliases]
+        while True:
+            for target in targets:
+                started = time.monotonic()
+                self.sync(source, target, options['pages'])
+                self.stdout.write(
+                    f'{target}: {time.monotonic() - started:.2f} с'
+                )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def path(self, alias):
+        if alias not in connections.databases:
+            raise CommandError(f'Нет базы {alias} в DATABASES.')
+        connection = connections[alias]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f'{alias}: копируются только базы SQLite.')
+        return connection.settings_dict['NAME']
+
+    def sync(self, source, target, pages):
+        # backup API копирует согласованный снимок, не останавливая
+        # запись в основную базу, а читатели реплики ждут busy_timeout.
+        src = sqlite3.connect(source)
+        dst = sqlite3.connect(target, timeout=30)
+        try:
+            src.backup(dst, pages=pages, sleep=0.005)
+        finally:
+            dst.close()
+            src.close()
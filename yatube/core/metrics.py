@@ -0,0 +1,249 @@
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# Файл с суммой метрик завершившихся процессов.
+ARCHIVE = 'archive'
+
+METRICS = {
+    'yatube_requests_total': (
+        'counter', 'Запросы по представлению, методу и статусу.',
+    ),
+    'yatube_request_duration_seconds': (
+        'histogram', 'Время ответа представления, секунд.',
+    ),
+    'yatube_db_queries': (
+        'histogram', 'Число запросов к базе на один HTTP-запрос.',
+    ),
+    'yatube_cache_total': (
+        'counter', 'Попадания и промахи кэшей страниц и счётчиков лент.',
+    ),
+}
+
+
+def _key(name, labels):
+    return json.dumps([name, sorted(labels.items())], ensure_ascii=False)
+
+
+class Registry:
+    """Метрики одного процесса с периодическим сбросом в файл.
+
+    Каждый процесс пишет свой METRICS_DIR/<pid>.json, а /metrics
+    складывает файлы всех процессов, так что воркеры не делят память
+    и не нуждаются во внешнем сервисе.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.counters = {}
+        self.histograms = {}
+        self.flushed_at = 0.0
+        self.pruned = False
+
+    def _check_fork(self):
+        # После fork потомок не должен повторно отчитаться за родителя.
+        if self.pid != os.getpid():
+            self.reset()
+
+    def inc(self, name, value=1, **labels):
+        if not settings.METRICS_ENABLED:
+            return
+        key = _key(name, labels)
+        with self.lock:
+            self._check_fork()
+            self.counters[key] = self.counters.get(key, 0) + value
+        self.flush()
+
+    def observe(self, name, value, buckets, **labels):
+        if not settings.METRICS_ENABLED:
+            return
+        key = _key(name, labels)
+        with self.lock:
+            self._check_fork()
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'buckets': list(buckets),
+                    'counts': [0] * (len(buckets) + 1),
+                    'sum': 0.0,
+                }
+            histogram['counts'][bisect_left(buckets, value)] += 1
+            histogram['sum'] += value
+        self.flush()
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        interval = settings.METRICS_FLUSH_INTERVAL
+        if not force and now - self.flushed_at < interval:
+            return
+        with self.lock:
+            self._check_fork()
+            self.flushed_at = now
+            data = json.dumps({
+                'counters': self.counters,
+                'histograms': self.histograms,
+            }, ensure_ascii=False)
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        if not self.pruned:
+            # Первый сброс процесса: заодно убираем файлы завершившихся.
+            prune_dead_processes()
+            self.pruned = True
+        path = os.path.join(settings.METRICS_DIR, f'{self.pid}.json')
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as target:
+            target.write(data)
+        os.replace(temporary, path)
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Процесс есть, но принадлежит другому пользователю.
+        pass
+    return True
+
+
+def _read(path):
+    try:
+        with open(path, encoding='utf-8') as source:
+            return json.load(source)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(counters, histograms, data):
+    for key, value in data['counters'].items():
+        counters[key] = counters.get(key, 0) + value
+    for key, histogram in data['histograms'].items():
+        merged = histograms.get(key)
+        if merged is None or merged['buckets'] != histogram['buckets']:
+            histograms[key] = histogram
+            continue
+        merged['counts'] = [
+            a + b for a, b in zip(merged['counts'], histogram['counts'])
+        ]
+        merged['sum'] += histogram['sum']
+
+
+def prune_dead_processes():
+    """Переносит в архив METRICS_DIR файлы процессов, которых уже нет.
+
+    Иначе /metrics складывал бы их вечно, а процесс, получивший pid
+    завершившегося, подменил бы его счётчики своими посреди ряда.
+    Счётчики и гистограммы мёртвого процесса прибавляются к
+    archive.json, как в multiprocess-режиме prometheus_client:
+    сумма не уменьшается, и Prometheus не видит сброса. Gauge
+    в реестре нет, а их значения умершего процесса и не нужны.
+    """
+    directory = settings.METRICS_DIR
+    with open(os.path.join(directory, f'{ARCHIVE}.lock'), 'a') as lock:
+        # Один архиватор за раз: иначе два процесса сложили бы
+        # один файл дважды или затёрли бы архив друг друга.
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        dead = []
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            name = os.path.basename(path)[:-len('.json')]
+            if name.isdigit() and not _is_alive(int(name)):
+                dead.append(path)
+        if not dead:
+            return
+        archive = os.path.join(directory, f'{ARCHIVE}.json')
+        data = _read(archive) or {'counters': {}, 'histograms': {}}
+        for path in dead:
+            other = _read(path)
+            if other is not None:
+                _merge(data['counters'], data['histograms'], other)
+        temporary = f'{archive}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as target:
+            json.dump(data, target, ensure_ascii=False)
+        os.replace(temporary, archive)
+        for path in dead:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+registry = Registry()
+
+
+def collect():
+    """Сумма метрик всех процессов из METRICS_DIR."""
+    registry.flush(force=True)
+    counters = {}
+    histograms = {}
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+        data = _read(path)
+        if data is not None:
+            _merge(counters, histograms, data)
+    return counters, histograms
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        f'{name}="{_escape(value)}"' for name, value in labels
+    )
+    return f'{{{pairs}}}'
+
+
+def _escape(value):
+    return (
+        str(value)
+        .replace('\\', r'\\')
+        .replace('"', r'\"')
+        .replace('\n', r'\n')
+    )
+
+
+def _group(series):
+    by_name = {}
+    for key, value in sorted(series.items()):
+        name, labels = json.loads(key)
+        by_name.setdefault(name, []).append((labels, value))
+    return by_name
+
+
+def render():
+    """Текстовый формат Prometheus 0.0.4."""
+    counters, histograms = collect()
+    lines = []
+    for name, series in sorted({
+        **_group(counters), **_group(histograms),
+    }.items()):
+        kind, help_text = METRICS.get(name, ('untyped', ''))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in series:
+            if kind != 'histogram':
+                lines.append(f'{name}{_labels(labels)} {value}')
+                continue
+            total = 0
+            bounds = value['buckets'] + ['+Inf']
+            for bound, count in zip(bounds, value['counts']):
+                total += count
+                lines.append(
+                    f'{name}_bucket{_labels(labels + [["le", bound]])} '
+                    f'{total}'
+                )
+            lines.append(f'{name}_sum{_labels(labels)} {value["sum"]}')
+            lines.append(f'{name}_count{_labels(labels)} {total}')
+    return '\n'.join(lines) + '\n'
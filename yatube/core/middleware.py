@@ -0,0 +1,165 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.utils import timezone
+
+from . import profiling
+from .metrics import DURATION_BUCKETS, QUERY_BUCKETS, registry
+from .routers import RequestPin, request_pin
+from .timing import RequestTimings, current_timings
+
+logger = logging.getLogger('core.timing')
+
+
+class ServerTimingMiddleware:
+    """Отдаёт время в базе, в шаблонах и всего в заголовке Server-Timing.
+
+    Те же замеры пишутся строкой JSON в лог core.timing вместе с именем
+    представления. Должен стоять первым в MIDDLEWARE, чтобы «всего»
+    включало остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SERVER_TIMING_ENABLED:
+            return self.get_response(request)
+        timings = request.timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        total = timings.total_time
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={timings.db_time * 1000:.1f};'
+            f'desc="{timings.db_count} queries"',
+            f'tpl;dur={timings.template_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'view': timings.view_name,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'total_ms': round(total * 1000, 2),
+                'db_ms': round(timings.db_time * 1000, 2),
+                'queries': timings.db_count,
+                'template_ms': round(timings.template_time * 1000, 2),
+            }, ensure_ascii=False))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = getattr(request, 'timings', None)
+        if timings is not None:
+            timings.view_name = request.resolver_match.view_name
+
+
+class MetricsMiddleware:
+    """Считает запросы, время ответа и число запросов к базе для /metrics.
+
+    Ставится сразу после ServerTimingMiddleware и берёт число запросов
+    к базе из его замеров.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        if view == 'metrics':
+            return response
+        registry.inc(
+            'yatube_requests_total',
+            view=view, method=request.method, status=response.status_code,
+        )
+        registry.observe(
+            'yatube_request_duration_seconds',
+            time.perf_counter() - started, DURATION_BUCKETS, view=view,
+        )
+        timings = getattr(request, 'timings', None)
+        if timings is not None:
+            registry.observe(
+                'yatube_db_queries', timings.db_count, QUERY_BUCKETS,
+                view=view,
+            )
+        return response
+
+
+class ProfilerMiddleware:
+    """Профиль одного запроса сотрудника вместо страницы.
+
+    ?_profile=1 — стеки, снятые с интервалом PROFILE_SAMPLE_INTERVAL,
+    в свёрнутом виде для flamegraph; ?_profile=cprofile — таблица
+    cProfile по накопленному времени. Если задан PROFILE_DIR, профиль
+    сохраняется туда. Ставится после AuthenticationMiddleware.
+    """
+
+    MODES = {'1': 'folded', 'folded': 'folded', 'cprofile': 'cprofile'}
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = self.MODES.get(request.GET.get('_profile'))
+        if mode is None or not request.user.is_staff:
+            return self.get_response(request)
+        profiler = None
+        if mode == 'folded':
+            response, content = profiling.sample(self.get_response, request)
+        else:
+            response, content, profiler = profiling.profile(
+                self.get_response, request,
+            )
+        result = HttpResponse(content, content_type='text/plain')
+        result['X-Profiled-Status'] = response.status_code
+        if settings.PROFILE_DIR:
+            match = request.resolver_match
+            view = match.view_name if match else 'unresolved'
+            name = (
+                f'{timezone.now():%Y%m%d-%H%M%S-%f}-'
+                f'{view.replace(":", "-")}.'
+                f'{"folded" if mode == "folded" else "txt"}'
+            )
+            result['X-Profile-Path'] = profiling.save(name, content, profiler)
+        return result
+
+
+class ReplicaPinningMiddleware:
+    """Читает с основной базы, пока реплики могут отставать от записи.
+
+    После запроса, который писал в базу, ставит cookie на
+    REPLICA_PIN_SECONDS; с ней чтения этого пользователя идут
+    в основную базу, и он сразу видит свой пост.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        cookie = settings.REPLICA_PIN_COOKIE
+        pin = RequestPin(pinned=cookie in request.COOKIES)
+        token = request_pin.set(pin)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_pin.reset(token)
+        if pin.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                cookie, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
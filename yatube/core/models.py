@@ -0,0 +1,52 @@
+from django.db import models
+
+
+class Task(models.Model):
+    """Задача очереди core.queue, ждущая воркера manage.py run_worker.
+
+    Выполненные задачи удаляются, в таблице остаются только ждущие
+    и окончательно упавшие. Взятая воркером задача не видна другим
+    до run_at: если воркер умрёт, её подберёт следующий.
+    """
+
+    QUEUED = 'queued'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (FAILED, 'Упала'),
+    )
+
+    name = models.CharField(max_length=200, verbose_name='Задача')
+    payload = models.TextField(verbose_name='Аргументы в JSON')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+        verbose_name='Состояние',
+    )
+    run_at = models.DateTimeField(verbose_name='Выполнить не раньше')
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Попыток',
+    )
+    locked_by = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name='Взята воркером',
+    )
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Поставлена',
+    )
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('status', 'run_at'),
+                name='task_status_run_at_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
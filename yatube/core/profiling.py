@@ -0,0 +1,88 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+
+from django.conf import settings
+
+
+def frame_name(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(settings.BASE_DIR):
+        filename = filename[len(settings.BASE_DIR) + 1:]
+    elif 'site-packages/' in filename:
+        filename = filename.split('site-packages/', 1)[1]
+    return f'{filename}:{code.co_name}'
+
+
+def fold_stack(frame):
+    """Стек от корня к вершине в одну строку через ';', как для flamegraph."""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """Снимает стек потока с заданным интервалом, пока открыт контекст."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[fold_stack(frame)] += 1
+
+    def folded(self):
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in self.stacks.most_common()
+        )
+
+
+def sample(func, *args):
+    """Вызывает func и возвращает (результат, свёрнутые стеки)."""
+    with StackSampler(
+        threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL,
+    ) as sampler:
+        result = func(*args)
+    return result, sampler.folded()
+
+
+def profile(func, *args):
+    """Вызывает func под cProfile: (результат, таблица, профилировщик)."""
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args)
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.sort_stats('cumulative').print_stats(settings.PROFILE_LIMIT)
+    return result, output.getvalue(), profiler
+
+
+def save(name, content, profiler=None):
+    """Кладёт профиль в PROFILE_DIR; у cProfile ещё и .prof для pstats."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    path = os.path.join(settings.PROFILE_DIR, name)
+    with open(path, 'w', encoding='utf-8') as target:
+        target.write(content)
+    if profiler is not None:
+        profiler.dump_stats(f'{os.path.splitext(path)[0]}.prof')
+    return path
@@ -0,0 +1,168 @@
+import json
+import logging
+import traceback
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+from .routers import RequestPin, request_pin
+
+logger = logging.getLogger(__name__)
+
+# Зарегистрированные задачи: имя -> функция.
+TASKS = {}
+
+
+def task(func=None, *, name=None, batch_size=1, max_attempts=None):
+    """Регистрирует функцию как задачу очереди.
+
+    func.delay(**kwargs) ставит задачу в очередь в текущей транзакции:
+    она выполнится, только если транзакция зафиксирована.
+    При batch_size > 1 воркер берёт до batch_size задач с этим именем
+    разом и передаёт функции список их аргументов.
+    """
+    def decorator(func):
+        func.task_name = name or f'{func.__module__}.{func.__name__}'
+        func.batch_size = batch_size
+        func.max_attempts = max_attempts
+        func.delay = lambda **kwargs: enqueue(func.task_name, **kwargs)
+        TASKS[func.task_name] = func
+        return func
+    return decorator if func is None else decorator(func)
+
+
+def _using():
+    # Очередь всегда читается с основной базы: реплика отстаёт.
+    return router.db_for_write(Task)
+
+
+def enqueue(name, **kwargs):
+    payload = json.dumps(kwargs, cls=DjangoJSONEncoder)
+    if settings.TASKS_EAGER:
+        # Без воркера: как он, но сразу после коммита и в этом потоке.
+        transaction.on_commit(
+            lambda: call(TASKS[name], [json.loads(payload)]),
+        )
+        return None
+    return Task.objects.using(_using()).create(
+        name=name, payload=payload, run_at=timezone.now(),
+    )
+
+
+def call(func, payloads):
+    # Задачу ставят сразу после записи, а реплика может отставать:
+    # всё, что задача читает, берётся с основной базы.
+    token = request_pin.set(RequestPin(pinned=True))
+    try:
+        if func.batch_size > 1:
+            return func(payloads)
+        return func(**payloads[0])
+    finally:
+        request_pin.reset(token)
+
+
+def backoff(attempts):
+    """Пауза перед следующей попыткой: растёт вдвое с каждой неудачей."""
+    return min(
+        settings.TASK_RETRY_BACKOFF * 2 ** max(attempts - 1, 0),
+        settings.TASK_RETRY_BACKOFF_MAX,
+    )
+
+
+def _max_attempts(func):
+    return getattr(func, 'max_attempts', None) or settings.TASK_MAX_ATTEMPTS
+
+
+def claim(visibility_timeout=None):
+    """Берёт задачу (или пачку одноимённых) из очереди.
+
+    Возвращает (имя, токен, [(pk, попытки, payload)]) или None.
+    Взятые задачи не видны другим воркерам visibility_timeout секунд.
+    Задачи, исчерпавшие попытки без итога (воркер умер или завис),
+    помечаются упавшими, а не берутся снова.
+    """
+    using = _using()
+    timeout = visibility_timeout or settings.TASK_VISIBILITY_TIMEOUT
+    while True:
+        now = timezone.now()
+        ready = Task.objects.using(using).filter(
+            status=Task.QUEUED, run_at__lte=now,
+        ).order_by('run_at', 'pk')
+        head = ready.values_list('name', flat=True).first()
+        if head is None:
+            return None
+        func = TASKS.get(head)
+        limit = func.batch_size if func is not None else 1
+        token = uuid4().hex
+        with transaction.atomic(using=using):
+            exhausted = ready.filter(
+                name=head, attempts__gte=_max_attempts(func),
+            ).update(
+                status=Task.FAILED,
+                locked_by='',
+                last_error='Попытки исчерпаны: итог последней не записан.',
+            )
+            # Сразу UPDATE: из двух воркеров задачу получит один,
+            # а SQLite не придётся поднимать чтение до записи.
+            Task.objects.using(using).filter(
+                pk__in=ready.filter(name=head).values('pk')[:limit],
+            ).update(
+                locked_by=token,
+                run_at=now + timedelta(seconds=timeout),
+                attempts=F('attempts') + 1,
+            )
+            rows = list(Task.objects.using(using).filter(
+                locked_by=token,
+            ).order_by('pk').values_list('pk', 'attempts', 'payload'))
+        if rows:
+            return head, token, rows
+        if not exhausted:
+            return None
+
+
+def execute(name, token, rows):
+    """Выполняет взятые задачи и записывает итог. True — успех."""
+    using = _using()
+    tasks = Task.objects.using(using).filter(
+        pk__in=[pk for pk, _, _ in rows], locked_by=token,
+    )
+    try:
+        func = TASKS.get(name)
+        if func is None:
+            raise LookupError(f'Задача {name} не зарегистрирована')
+        call(func, [json.loads(payload) for _, _, payload in rows])
+    except Exception:
+        logger.exception('Задача %s упала', name)
+        fail(name, token, rows, traceback.format_exc())
+        return False
+    tasks.delete()
+    return True
+
+
+def fail(name, token, rows, error):
+    func = TASKS.get(name)
+    max_attempts = _max_attempts(func)
+    now = timezone.now()
+    tasks = Task.objects.using(_using()).filter(locked_by=token)
+    for pk, attempts, _ in rows:
+        if func is None or attempts >= max_attempts:
+            changes = {'status': Task.FAILED}
+        else:
+            changes = {
+                'run_at': now + timedelta(seconds=backoff(attempts)),
+            }
+        tasks.filter(pk=pk).update(locked_by='', last_error=error, **changes)
+
+
+def run_claimed(name, token, rows):
+    # Точка входа в потоке или процессе пула воркера.
+    try:
+        return execute(name, token, rows)
+    finally:
+        connections.close_all()
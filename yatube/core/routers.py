@@ -0,0 +1,53 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+PRIMARY = 'default'
+
+
+class RequestPin:
+    """Записи одного запроса и привязка его чтений к основной базе.
+
+    pinned — читать с основной базы до конца запроса: в нём уже была
+    запись, или пользователь недавно писал (см. ReplicaPinningMiddleware).
+    """
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+# Ставят и снимают middleware и core.queue.call, который привязывает
+# фоновые задачи к основной базе. В командах запись никого не привязывает.
+request_pin = ContextVar('request_pin', default=None)
+
+
+class ReplicaRouter:
+    """Чтение с реплик из DATABASE_REPLICAS, запись в основную базу."""
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        pin = request_pin.get()
+        if (
+            not replicas
+            or (pin is not None and pin.pinned)
+            or connections[PRIMARY].in_atomic_block
+        ):
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        pin = request_pin.get()
+        if pin is not None:
+            pin.pinned = pin.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        return obj1._state.db in databases and obj2._state.db in databases
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Реплики — копии основной базы, схему им не мигрируют.
+        return db not in settings.DATABASE_REPLICAS
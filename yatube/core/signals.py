@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .slowlog import log_slow_queries
+
+
+@receiver(connection_created)
+def install_slow_query_log(sender, connection, **kwargs):
+    # В начало списка: connection.execute_wrapper() снимает обёртку
+    # с конца, а соединение может открыться уже внутри такого блока.
+    if log_slow_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, log_slow_queries)
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
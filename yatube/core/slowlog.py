@@ -0,0 +1,63 @@
+import json
+import logging
+import re
+import time
+import traceback
+
+from django.conf import settings
+from django.utils import timezone
+
+from .timing import current_timings
+
+logger = logging.getLogger('core.slow_queries')
+
+STACK_DEPTH = 6
+FINGERPRINT_RULES = (
+    # Строки и числа, которые ORM вставляет в SQL сам (LIMIT, OFFSET).
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    # IN (?, ?, ?) разной длины — один и тот же запрос.
+    (re.compile(r'\bIN \((?:\?, )*\?\)', re.IGNORECASE), 'IN (...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def fingerprint(sql):
+    """SQL без литералов и параметров: ключ для группировки запросов."""
+    for pattern, replacement in FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def project_stack():
+    """Последние кадры стека из кода проекта, без Django и этого модуля."""
+    frames = [
+        f'{frame.filename[len(settings.BASE_DIR) + 1:]}:{frame.lineno} '
+        f'in {frame.name}'
+        for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(settings.BASE_DIR)
+        and '/site-packages/' not in frame.filename
+        and frame.filename != __file__
+    ]
+    return frames[-STACK_DEPTH:]
+
+
+def log_slow_queries(execute, sql, params, many, context):
+    """Обёртка connection.execute_wrapper: пишет запросы дольше порога."""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (time.perf_counter() - started) * 1000
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold is not None and duration >= threshold:
+            timings = current_timings.get()
+            logger.warning(json.dumps({
+                'time': timezone.now().isoformat(),
+                'duration_ms': round(duration, 2),
+                'fingerprint': fingerprint(sql),
+                'sql': sql[:2000],
+                'view': timings.view_name if timings else None,
+                'stack': project_stack(),
+            }, ensure_ascii=False))
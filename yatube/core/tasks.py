@@ -0,0 +1,44 @@
+import logging
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+from .queue import task
+
+logger = logging.getLogger(__name__)
+
+
+def _email(message, connection=None):
+    email = EmailMultiAlternatives(
+        message['subject'],
+        message['body'],
+        message.get('from_email'),
+        message['to'],
+        connection=connection,
+    )
+    if message.get('html'):
+        email.attach_alternative(message['html'], 'text/html')
+    return email
+
+
+@task(batch_size=50)
+def send_email(messages):
+    """Отправляет письма пачки через одно соединение EMAIL_BACKEND.
+
+    Каждое письмо — словарь subject, body, to и необязательные
+    from_email, html. Пачка не атомарна: письма уходят по одному,
+    а упавшее ставится в очередь отдельной задачей send_one_email,
+    чтобы повтор не разослал заново уже отправленные.
+    """
+    with get_connection() as connection:
+        for message in messages:
+            try:
+                connection.send_messages([_email(message)])
+            except Exception:
+                logger.exception('Письмо для %s не отправлено', message['to'])
+                send_one_email.delay(**message)
+
+
+@task
+def send_one_email(**message):
+    # Повторы с паузами и пометку упавшим даёт сама очередь.
+    _email(message).send()
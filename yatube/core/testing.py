@@ -0,0 +1,36 @@
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+@contextmanager
+def isolated_cache():
+    """Кэш по умолчанию в своём временном каталоге на время тестов.
+
+    Кэш общий для процессов и живёт между запусками: без этого тесты
+    получали бы страницы и счётчики сервера разработки и прошлых прогонов.
+    """
+    directory = tempfile.mkdtemp(prefix='yatube-test-cache-')
+    caches = {
+        'default': {**settings.CACHES['default'], 'LOCATION': directory},
+    }
+    try:
+        with override_settings(CACHES=caches):
+            yield
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache = isolated_cache()
+        self.cache.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,16 @@
+from django.test import SimpleTestCase, override_settings
+
+from core.checks import check_shared_cache
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    def test_process_local_cache_is_an_error(self):
+        """Кэш в памяти процесса не проходит проверку, файловый — проходит."""
+
+        self.assertEqual(check_shared_cache(None), [])
+        locmem = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}
+        with override_settings(CACHES=locmem):
+            errors = check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ['core.E001'])
@@ -0,0 +1,81 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from core.management.commands.loadtest import compare
+from core.utils import percentile
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class LoadtestHelpersTests(SimpleTestCase):
+    def test_percentile(self):
+        """Процентиль по ближайшему рангу."""
+
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_compare(self):
+        """Регрессией считается рост p95 сверх порога и лишние запросы."""
+
+        def run(p95, queries):
+            return {'views': {'posts:index': {
+                'latency_ms': {'p95': p95}, 'queries': queries,
+            }}}
+
+        self.assertEqual(compare(run(11, 2), run(10, 2), 20), [])
+        self.assertEqual(len(compare(run(13, 2), run(10, 2), 20)), 1)
+        self.assertEqual(len(compare(run(10, 3), run(10, 2), 20)), 1)
+
+
+class LoadtestCommandTests(LiveServerTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+        group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(author=self.user, text='Пост', group=group)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_loadtest_reports_every_named_url(self):
+        """Прогон проходит все адреса и сравнивается с базой."""
+
+        output = os.path.join(self.directory, 'run.json')
+        call_command(
+            'loadtest', '--base-url', self.live_server_url,
+            '--requests', '3', '--concurrency', '2', '--warmup', '0',
+            '--output', output, stdout=StringIO(), stderr=StringIO(),
+        )
+        with open(output) as source:
+            results = json.load(source)
+        views = results['views']
+        for view in ('posts:index', 'posts:group_list', 'posts:profile',
+                     'posts:post_detail', 'users:login', 'about:tech'):
+            with self.subTest(view=view):
+                self.assertEqual(views[view]['statuses'], {'200': 3})
+                self.assertGreater(views[view]['bytes'], 0)
+        self.assertGreater(views['posts:post_detail']['queries'], 0)
+
+        for stats in views.values():
+            stats['latency_ms']['p95'] = 0
+        with open(output, 'w') as source:
+            json.dump(results, source)
+        with self.assertRaisesMessage(CommandError, 'Регрессии'):
+            call_command(
+                'loadtest', '--base-url', self.live_server_url,
+                '--requests', '3', '--view', 'posts:index',
+                '--baseline', output, stdout=StringIO(),
+            )
@@ -0,0 +1,31 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+
+class SqliteSetupTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied(self):
+        """Новое соединение получает PRAGMA из настроек."""
+
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('cache_size'), -64000)
+
+    def test_bench_sqlite(self):
+        """Бенчмарк выводит оба прогона."""
+
+        out = StringIO()
+        call_command(
+            'bench_sqlite', '--rows', '100', '--readers', '1',
+            '--writers', '1', '--duration', '0.1', stdout=out,
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith('SQLITE_PRAGMAS: чтений'))
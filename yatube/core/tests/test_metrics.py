@@ -0,0 +1,135 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import registry
+from posts.models import Post
+
+User = get_user_model()
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings = override_settings(
+            METRICS_DIR=directory,
+            METRICS_TOKEN='secret',
+            PAGE_CACHE_ENABLED=True,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.directory = directory
+        registry.reset()
+        self.addCleanup(registry.reset)
+        cache.clear()
+
+    def metric(self, text, line):
+        match = re.search(rf'^{re.escape(line)} (\S+)$', text, re.MULTILINE)
+        self.assertIsNotNone(match, f'{line} не найдена в\n{text}')
+        return float(match[1])
+
+    def test_metrics_merge_views_cache_and_other_processes(self):
+        """Метрики по представлениям, кэшам и файлам других воркеров."""
+
+        index = reverse('posts:index')
+        self.client.get(index)
+        self.client.get(index)
+        with open(os.path.join(self.directory, '1.json'), 'w') as other:
+            json.dump({'counters': {json.dumps([
+                'yatube_requests_total',
+                [['method', 'GET'], ['status', 200],
+                 ['view', 'posts:index']],
+            ]): 5}, 'histograms': {}}, other)
+
+        text = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret',
+        ).content.decode()
+        self.assertEqual(self.metric(text, (
+            'yatube_requests_total'
+            '{method="GET",status="200",view="posts:index"}'
+        )), 7)
+        self.assertEqual(self.metric(text, (
+            'yatube_request_duration_seconds_count{view="posts:index"}'
+        )), 2)
+        self.assertEqual(self.metric(text, (
+            'yatube_db_queries_bucket{view="posts:index",le="+Inf"}'
+        )), 2)
+        self.assertEqual(self.metric(text, (
+            'yatube_cache_total{cache="page",result="hit"}'
+        )), 1)
+        self.assertEqual(self.metric(text, (
+            'yatube_cache_total{cache="page",result="miss"}'
+        )), 1)
+        self.assertIn('# TYPE yatube_db_queries histogram', text)
+        self.assertNotIn('view="metrics"', text)
+
+    def test_metrics_require_token(self):
+        """Без верного токена /metrics не показывается."""
+
+        for headers in ({}, {'HTTP_AUTHORIZATION': 'Bearer wrong'},
+                        {'HTTP_AUTHORIZATION': 'Bearer сикрет'}):
+            with self.subTest(headers=headers):
+                response = self.client.get(reverse('metrics'), **headers)
+                self.assertEqual(response.status_code, 404)
+        with override_settings(METRICS_TOKEN=None):
+            response = self.client.get(
+                reverse('metrics'), HTTP_AUTHORIZATION='Bearer None',
+            )
+        self.assertEqual(response.status_code, 404)
+
+    def test_files_of_dead_processes_are_archived(self):
+        """Файлы завершившихся процессов уходят в архив, суммы не падают."""
+
+        line = 'yatube_cache_total{cache="page",result="hit"}'
+        key = json.dumps(
+            ['yatube_cache_total', [['cache', 'page'], ['result', 'hit']]],
+        )
+        histogram = {'buckets': [1, 2], 'counts': [1, 0, 0], 'sum': 0.5}
+        # Больше наибольшего pid в Linux: таких процессов нет.
+        dead = [
+            os.path.join(self.directory, f'{2 ** 22 + shift}.json')
+            for shift in (1, 2)
+        ]
+        alive = os.path.join(self.directory, f'{os.getppid()}.json')
+        for path in (*dead, alive):
+            with open(path, 'w') as other:
+                json.dump({
+                    'counters': {key: 2},
+                    'histograms': {
+                        json.dumps(['yatube_db_queries', []]): histogram,
+                    },
+                }, other)
+        registry.inc('yatube_cache_total', cache='page', result='hit')
+        for path in dead:
+            self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(alive))
+        self.assertTrue(
+            os.path.exists(os.path.join(self.directory, f'{os.getpid()}.json'))
+        )
+        text = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret',
+        ).content.decode()
+        self.assertEqual(self.metric(text, line), 7)
+        self.assertEqual(self.metric(text, 'yatube_db_queries_count'), 3)
+
+        # Следующий архиватор не складывает архив с собой ещё раз.
+        registry.reset()
+        registry.inc('yatube_cache_total', cache='page', result='hit')
+        text = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret',
+        ).content.decode()
+        self.assertEqual(self.metric(text, line), 7)
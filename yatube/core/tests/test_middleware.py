@@ -0,0 +1,48 @@
+import json
+import re
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+TIMING = re.compile(
+    r'db;dur=(?P<db>[\d.]+);desc="(?P<queries>\d+) queries", '
+    r'tpl;dur=(?P<tpl>[\d.]+), total;dur=(?P<total>[\d.]+)'
+)
+
+
+class ServerTimingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def test_server_timing_header_and_log(self):
+        """Заголовок и строка лога содержат замеры и имя представления."""
+
+        url = reverse('posts:profile', kwargs={'username': 'auth'})
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            response = self.client.get(url)
+        timing = TIMING.fullmatch(response['Server-Timing'])
+        self.assertIsNotNone(timing, response['Server-Timing'])
+        self.assertGreater(int(timing['queries']), 0)
+        self.assertGreater(float(timing['tpl']), 0)
+        self.assertGreaterEqual(
+            float(timing['total']), float(timing['tpl']),
+        )
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'posts:profile')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], int(timing['queries']))
+
+    @override_settings(SERVER_TIMING_ENABLED=False)
+    def test_disabled(self):
+        """Выключенный замер не добавляет заголовок."""
+
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
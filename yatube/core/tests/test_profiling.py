@@ -0,0 +1,79 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.profiling import StackSampler, fold_stack
+
+User = get_user_model()
+
+
+class FoldStackTests(SimpleTestCase):
+    def test_fold_stack(self):
+        """Стек сворачивается от корня к текущей функции."""
+
+        stack = fold_stack(sys._getframe())
+        self.assertTrue(stack.endswith(
+            'core/tests/test_profiling.py:test_fold_stack'
+        ))
+        self.assertGreater(stack.count(';'), 1)
+
+    def test_sampler_counts_stacks(self):
+        """Сэмплер копит одинаковые стеки в один счётчик."""
+
+        with StackSampler(threading.get_ident(), 0.001) as sampler:
+            deadline = time.monotonic() + 0.05
+            while time.monotonic() < deadline:
+                pass
+        stack, count = sampler.folded().splitlines()[0].rsplit(' ', 1)
+        self.assertIn('test_sampler_counts_stacks', stack)
+        self.assertGreater(int(count), 1)
+
+
+class ProfilerMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        self.url = reverse('posts:profile', kwargs={'username': 'auth'})
+
+    def test_profile_only_for_staff(self):
+        """Обычный пользователь получает страницу, а не профиль."""
+
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, {'_profile': 'cprofile'})
+        self.assertTemplateUsed(response, 'posts/profile.html')
+
+    def test_cprofile_table(self):
+        """Таблица cProfile отсортирована по накопленному времени."""
+
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, {'_profile': 'cprofile'})
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertEqual(response['X-Profiled-Status'], '200')
+        content = response.content.decode()
+        self.assertIn('Ordered by: cumulative time', content)
+        self.assertIn('posts/views.py', content)
+
+    def test_folded_profile_saved_to_disk(self):
+        """Свёрнутые стеки сохраняются в PROFILE_DIR."""
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.client.force_login(self.staff)
+        with override_settings(PROFILE_DIR=directory):
+            response = self.client.get(self.url, {'_profile': '1'})
+        path = response['X-Profile-Path']
+        self.assertTrue(path.endswith('posts-profile.folded'))
+        with open(path) as saved:
+            self.assertEqual(saved.read(), response.content.decode())
+        self.assertEqual(os.listdir(directory), [os.path.basename(path)])
@@ -0,0 +1,194 @@
+from concurrent.futures import Executor, Future
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Task
+from core.queue import claim, execute, task
+from core.tasks import send_email
+
+CALLS = []
+
+
+@task(name='tests.record')
+def record(value):
+    CALLS.append(value)
+
+
+@task(name='tests.record_many', batch_size=10)
+def record_many(payloads):
+    CALLS.append([payload['value'] for payload in payloads])
+
+
+@task(name='tests.explode', max_attempts=2)
+def explode():
+    raise RuntimeError('Бум')
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_batch_is_claimed_together(self):
+        """Одноимённые пакетные задачи берутся и выполняются пачкой."""
+
+        for value in range(3):
+            record_many.delay(value=value)
+        record.delay(value='одна')
+        name, token, rows = claim()
+        self.assertEqual((name, len(rows)), ('tests.record_many', 3))
+        self.assertTrue(execute(name, token, rows))
+        self.assertEqual(CALLS, [[0, 1, 2]])
+        self.assertEqual(
+            list(Task.objects.values_list('name', flat=True)),
+            ['tests.record'],
+        )
+
+    def test_claimed_task_is_hidden_until_timeout(self):
+        """Взятая задача не видна другим, пока не истечёт таймаут."""
+
+        record.delay(value=1)
+        first = claim(visibility_timeout=60)
+        self.assertIsNotNone(first)
+        self.assertIsNone(claim())
+        # Воркер умер: время видимости вышло.
+        Task.objects.update(run_at=timezone.now() - timedelta(seconds=1))
+        name, token, rows = claim()
+        self.assertEqual(rows[0][1], 2)
+        self.assertNotEqual(token, first[1])
+        # Опоздавший первый воркер не удаляет чужую задачу.
+        self.assertTrue(execute(*first))
+        self.assertTrue(Task.objects.exists())
+
+    @override_settings(TASK_RETRY_BACKOFF=10)
+    def test_failed_task_retried_with_backoff(self):
+        """Упавшая задача повторяется с паузой, потом помечается упавшей."""
+
+        explode.delay()
+        started = timezone.now()
+        self.assertFalse(execute(*claim()))
+        retried = Task.objects.get()
+        self.assertEqual(retried.status, Task.QUEUED)
+        self.assertGreaterEqual(
+            retried.run_at, started + timedelta(seconds=10),
+        )
+        self.assertIn('Бум', retried.last_error)
+        self.assertIsNone(claim())
+
+        Task.objects.update(run_at=timezone.now())
+        self.assertFalse(execute(*claim()))
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+        self.assertIsNone(claim())
+
+    def test_hanging_task_fails_after_max_attempts(self):
+        """Задача, на которой воркер умирает, не берётся бесконечно."""
+
+        explode.delay()
+        record.delay(value=1)
+        Task.objects.filter(name='tests.record').update(
+            run_at=timezone.now() + timedelta(seconds=1),
+        )
+        for attempt in (1, 2):
+            name, _, rows = claim(visibility_timeout=60)
+            self.assertEqual((name, rows[0][1]), ('tests.explode', attempt))
+            # Воркер умер, не записав итог: время видимости вышло.
+            Task.objects.filter(name=name).update(
+                run_at=timezone.now() - timedelta(seconds=2),
+            )
+        Task.objects.filter(name='tests.record').update(
+            run_at=timezone.now() - timedelta(seconds=1),
+        )
+        name, _, _ = claim()
+        self.assertEqual(name, 'tests.record')
+        failed = Task.objects.get(name='tests.explode')
+        self.assertEqual((failed.status, failed.attempts), (Task.FAILED, 2))
+
+    def test_failed_email_is_retried_alone(self):
+        """Упавшее письмо пачки повторяется одно, без дублей остальных."""
+
+        for address in ('a@example.com', 'bad@example.com', 'b@example.com'):
+            send_email.delay(subject='Тема', body='Текст', to=[address])
+        send_messages = EmailBackend.send_messages
+
+        def refuse_bad(backend, emails):
+            if emails[0].to == ['bad@example.com']:
+                raise OSError('Адрес отклонён')
+            return send_messages(backend, emails)
+
+        with mock.patch.object(EmailBackend, 'send_messages', refuse_bad):
+            self.assertTrue(execute(*claim()))
+        self.assertEqual(
+            [message.to for message in mail.outbox],
+            [['a@example.com'], ['b@example.com']],
+        )
+        self.assertEqual(
+            Task.objects.get().name, 'core.tasks.send_one_email',
+        )
+        self.assertTrue(execute(*claim()))
+        self.assertEqual(mail.outbox[-1].to, ['bad@example.com'])
+        self.assertFalse(Task.objects.exists())
+
+
+class InlineExecutor(Executor):
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+
+# Потоки над общей базой SQLite в памяти ловят «table is locked»:
+# пул выполняет задачи в том же потоке.
+@mock.patch(
+    'core.management.commands.run_worker.ThreadPoolExecutor', InlineExecutor,
+)
+class WorkerTests(TransactionTestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_worker_drains_queue(self):
+        """run_worker --once выполняет всю готовую очередь и выходит."""
+
+        for value in range(5):
+            record.delay(value=value)
+        out = StringIO()
+        call_command('run_worker', '--once', '--concurrency=2', stdout=out)
+        self.assertEqual(sorted(CALLS), list(range(5)))
+        self.assertFalse(Task.objects.exists())
+        self.assertIn('Выполнено пачек: 5', out.getvalue())
+
+    def test_emails_are_queued(self):
+        """Письма регистрации и сброса пароля уходят через очередь."""
+
+        client = Client()
+        client.post(reverse('users:signup'), {
+            'username': 'new',
+            'email': 'new@example.com',
+            'password1': 'Sl0zhny-parol',
+            'password2': 'Sl0zhny-parol',
+        })
+        client.post(
+            reverse('users:password_reset'), {'email': 'new@example.com'},
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Task.objects.count(), 2)
+
+        call_command('run_worker', '--once', stdout=StringIO())
+        self.assertEqual(
+            [message.to for message in mail.outbox],
+            [['new@example.com'], ['new@example.com']],
+        )
+        self.assertIn('new', mail.outbox[0].body)
@@ -0,0 +1,114 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections
+from django.test import (SimpleTestCase, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from core.queue import call, task
+from core.routers import ReplicaRouter, RequestPin, request_pin
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def in_request(self):
+        pin = RequestPin()
+        token = request_pin.set(pin)
+        self.addCleanup(request_pin.reset, token)
+        return pin
+
+    def test_reads_go_to_replica_until_write(self):
+        """Чтения запроса идут на реплику, после записи — на основную."""
+
+        pin = self.in_request()
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertTrue(pin.wrote)
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_write_outside_request_does_not_pin(self):
+        """Вне запроса запись не привязывает чтения к основной базе."""
+
+        self.assertIsNone(request_pin.get())
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertIsNone(request_pin.get())
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_tasks_read_from_primary(self):
+        """Фоновая задача читает с основной базы: реплика может отстать."""
+
+        seen = []
+
+        @task(name='tests.routed_read')
+        def routed_read():
+            seen.append(self.router.db_for_read(Post))
+
+        call(routed_read, [{}])
+        self.assertEqual(seen, ['default'])
+        self.assertIsNone(request_pin.get())
+
+    def test_reads_in_transaction_use_primary(self):
+        """Внутри транзакции читаем с основной базы."""
+
+        with mock.patch.object(
+            connections['default'], 'in_atomic_block', True,
+        ):
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaPinningTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def test_write_pins_user_to_primary(self):
+        """После записи пользователь получает cookie и читает с основной."""
+
+        user = User.objects.create_user(username='auth')
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'},
+        )
+        self.assertIn('primary_pin', response.cookies)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('primary_pin', response.cookies)
+        self.assertIn('Новый пост', response.content.decode())
+        self.assertIsNone(request_pin.get())
+
+
+class SyncReplicaCommandTests(TestCase):
+    def test_sync_replica(self):
+        """Реплика получает копию основной базы."""
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        source = os.path.join(directory, 'primary.sqlite3')
+        target = os.path.join(directory, 'replica.sqlite3')
+        db = sqlite3.connect(source)
+        db.execute('CREATE TABLE t (x integer)')
+        db.executemany('INSERT INTO t VALUES (?)', [(1,), (2,)])
+        db.commit()
+        db.close()
+        call_command(
+            'sync_replica', '--source', source, '--target', target,
+            stdout=StringIO(),
+        )
+        db = sqlite3.connect(target)
+        self.assertEqual(db.execute('SELECT sum(x) FROM t').fetchone(), (3,))
+        db.close()
@@ -0,0 +1,79 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.slowlog import fingerprint
+
+User = get_user_model()
+
+
+class SlowQueryLogTests(TestCase):
+    def test_fingerprint(self):
+        """Отпечаток не зависит от литералов и длины списка IN."""
+
+        self.assertEqual(
+            fingerprint(
+                "SELECT * FROM t WHERE a = 'x''y' AND b IN (%s, %s)\n"
+                '  LIMIT 10 OFFSET 20'
+            ),
+            fingerprint(
+                "SELECT * FROM t WHERE a = 'z' AND b IN (%s) "
+                'LIMIT 5 OFFSET 0'
+            ),
+        )
+
+    def test_slow_queries_are_logged_with_view_and_stack(self):
+        """Медленный запрос пишется с отпечатком, представлением и стеком."""
+
+        cache.clear()
+        User.objects.create_user(username='auth')
+        url = reverse('posts:profile', kwargs={'username': 'auth'})
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=0):
+            with self.assertLogs('core.slow_queries') as logs:
+                self.client.get(url)
+        records = [json.loads(r.getMessage()) for r in logs.records]
+        views = {record['view'] for record in records}
+        self.assertIn('posts:profile', views)
+        record = next(r for r in records if r['view'] == 'posts:profile')
+        self.assertNotIn("'auth'", record['fingerprint'])
+        self.assertTrue(
+            any(frame.startswith('posts/') for frame in record['stack'])
+        )
+
+    def test_slow_queries_command(self):
+        """Команда сводит записи по отпечаткам с учётом ротации."""
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'slow.log')
+        records = [
+            ('SELECT ?', 10, 'posts:index'),
+            ('SELECT ?', 30, 'posts:profile'),
+            ('SELECT ?', 20, 'posts:index'),
+            ('UPDATE ?', 5, None),
+        ]
+        for name, chunk in ((path + '.1', records[:2]), (path, records[2:])):
+            with open(name, 'w') as log:
+                for sql, duration, view in chunk:
+                    log.write(json.dumps({
+                        'fingerprint': sql, 'duration_ms': duration,
+                        'view': view, 'sql': sql, 'stack': [],
+                    }) + '\n')
+                log.write('не JSON\n')
+        out = StringIO()
+        call_command('slow_queries', '--path', path, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertIn('3 раз', lines[0])
+        self.assertIn('60.0 мс всего', lines[0])
+        self.assertIn('p95     30.0 мс', lines[0])
+        self.assertIn('posts:index ×2', lines[0])
+        self.assertEqual(lines[1].strip(), 'SELECT ?')
+        self.assertIn('Отпечатков: 2, запросов: 4', lines[-1])
@@ -0,0 +1,61 @@
+import time
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates, Template
+
+current_timings = ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    """Замеры одного запроса: время в базе, число запросов и шаблоны."""
+
+    __slots__ = ('started', 'view_name', 'db_time', 'db_count',
+                 'template_time', 'template_depth')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_name = None
+        self.db_time = 0.0
+        self.db_count = 0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+    def __call__(self, execute, sql, params, many, context):
+        # Обёртка для connection.execute_wrapper.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.db_count += 1
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = current_timings.get()
+        if timings is None:
+            return super().render(context, request)
+        # Вложенный render_to_string уже учтён во внешнем шаблоне.
+        timings.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template_depth -= 1
+            if not timings.template_depth:
+                timings.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Движок DjangoTemplates, который засекает время рендера."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
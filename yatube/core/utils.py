@@ -0,0 +1,7 @@
+def percentile(values, q):
+    """Процентиль q (0..100) по методу ближайшего ранга."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    rank = max(1, -(-len(values) * q // 100))
+    return values[int(rank) - 1]
@@ -0,0 +1,20 @@
+from hmac import compare_digest
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+from .metrics import render
+
+
+def metrics(request):
+    """Метрики в формате Prometheus, только с токеном METRICS_TOKEN."""
+    token = settings.METRICS_TOKEN
+    # Байты: compare_digest не сравнивает строки не из ASCII.
+    authorization = request.META.get('HTTP_AUTHORIZATION', '').encode()
+    if not token or not compare_digest(
+        authorization, f'Bearer {token}'.encode(),
+    ):
+        raise Http404
+    return HttpResponse(
+        render(), content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
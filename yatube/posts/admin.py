@@ -1,6 +1,16 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
 
-from .models import Group, Post
+from .bulk import delete_posts, move_posts
+from .models import Follow, Group, Post
+from .search import fts_available, match_query, matching_ids
+
+
+class PostActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(), required=False, label='Группа',
+    )
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -15,7 +25,45 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    # Массовые действия пишут одним UPDATE, а не save() на пост.
+    action_form = PostActionForm
+    actions = ('move_to_group', 'clear_group')
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по тексту через индекс FTS5 вместо LIKE '%...%'.
+        if not search_term or not fts_available():
+            return super().get_search_results(
+                request, queryset, search_term,
+            )
+        if not match_query(search_term):
+            # В запросе нет ни одного слова: пустой MATCH — ошибка FTS5.
+            return queryset.none(), False
+        return queryset.filter(pk__in=matching_ids(search_term)), False
+
+    def move_to_group(self, request, queryset):
+        group = Group.objects.filter(
+            pk=request.POST.get('group') or None,
+        ).first()
+        if group is None:
+            self.message_user(
+                request, 'Выберите группу для переноса.', messages.ERROR,
+            )
+            return
+        moved = move_posts(queryset, group)
+        self.message_user(request, f'Перенесено в «{group}»: {moved}.')
+    move_to_group.short_description = 'Перенести в выбранную группу'
+
+    def clear_group(self, request, queryset):
+        cleared = move_posts(queryset, None)
+        self.message_user(request, f'Убрано из групп: {cleared}.')
+    clear_group.short_description = 'Убрать из группы'
+
+    def delete_queryset(self, request, queryset):
+        # delete_selected после подтверждения: счётчики сдвигаются
+        # один раз на пачку, а не на каждый пост.
+        delete_posts(queryset)
 
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
+admin.site.register(Follow)
@@ -0,0 +1,236 @@
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+
+from .bulk import create_posts
+from .conditional import conditional_page, feed_state
+from .forms import PostForm
+from .counters import FEED_INDEX
+from .models import AuthorStats, FeedCounter, Group, Post
+from .utils import KeysetPaginator
+
+# Поле ответа -> колонка для values(); автор и группа — без JOIN,
+# если их не просили.
+API_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'edited': 'edited',
+    'author': 'author__username',
+    'group': 'group__slug',
+}
+
+User = get_user_model()
+
+
+class ApiError(Exception):
+    def __init__(self, status, detail, **extra):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.extra = extra
+
+
+def api_response(data, status=200):
+    return JsonResponse(
+        data,
+        status=status,
+        encoder=DjangoJSONEncoder,
+        json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False},
+    )
+
+
+def api_view(*methods, status=200):
+    """Представление API: ответ и ошибки ApiError превращаются в JSON."""
+    def decorator(view):
+        @require_http_methods(methods)
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                return api_response(view(request, *args, **kwargs), status)
+            except ApiError as error:
+                return api_response(
+                    {'detail': error.detail, **error.extra}, error.status,
+                )
+        return wrapper
+    return decorator
+
+
+def requested_fields(request):
+    names = request.GET.get('fields')
+    if not names:
+        return list(API_FIELDS)
+    fields = [name for name in names.split(',') if name]
+    unknown = set(fields) - set(API_FIELDS)
+    if unknown:
+        raise ApiError(400, f'Неизвестные поля: {", ".join(sorted(unknown))}')
+    return fields
+
+
+def requested_limit(request):
+    limit = request.GET.get('limit', settings.NUMBER_OF_POSTS)
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ApiError(400, 'limit должен быть числом')
+    return max(1, min(limit, settings.API_MAX_LIMIT))
+
+
+def requested_ids(request):
+    try:
+        ids = [int(pk) for pk in request.GET['ids'].split(',') if pk]
+    except ValueError:
+        raise ApiError(400, 'ids — числа через запятую')
+    if len(ids) > settings.API_MAX_LIMIT:
+        raise ApiError(400, f'Не больше {settings.API_MAX_LIMIT} ids')
+    return ids
+
+
+def serialize(rows, fields):
+    return [
+        {field: row[API_FIELDS[field]] for field in fields} for row in rows
+    ]
+
+
+def feed_page(request, posts):
+    fields = requested_fields(request)
+    # Ключ курсора нужен всегда, даже если его не просили в fields.
+    columns = {API_FIELDS[field] for field in fields} | {'pub_date', 'id'}
+    paginator = KeysetPaginator(
+        posts.values(*columns), requested_limit(request), ('pub_date', 'id'),
+    )
+    page = paginator.get_page(
+        request.GET.get('after'), request.GET.get('before'),
+    )
+    return {
+        'results': serialize(page, fields),
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+def batch(request):
+    fields = requested_fields(request)
+    ids = requested_ids(request)
+    columns = {API_FIELDS[field] for field in fields} | {'id'}
+    rows = {
+        row['id']: row
+        for row in Post.objects.filter(pk__in=ids).values(*columns)
+    }
+    return {
+        'results': serialize([rows[pk] for pk in ids if pk in rows], fields),
+        'missing': [pk for pk in ids if pk not in rows],
+    }
+
+
+def _posts_state(request):
+    if 'ids' in request.GET:
+        try:
+            ids = requested_ids(request)
+        except ApiError:
+            return None
+        # Пачка не длиннее API_MAX_LIMIT: её COUNT дёшев.
+        return feed_state(Post.objects.filter(pk__in=ids), None)
+    return feed_state(
+        Post.objects.all(), FeedCounter.objects.filter(feed=FEED_INDEX),
+    )
+
+
+def _group_state(request, slug):
+    return feed_state(
+        Post.objects.filter(group__slug=slug),
+        Group.objects.filter(slug=slug),
+    )
+
+
+def _profile_state(request, username):
+    return feed_state(
+        Post.objects.filter(author__username=username),
+        AuthorStats.objects.filter(author__username=username),
+    )
+
+
+def _post_state(request, post_id):
+    return feed_state(Post.objects.filter(pk=post_id), None)
+
+
+@conditional_page(_posts_state)
+@api_view('GET')
+def posts(request):
+    """Лента всех постов или пачка постов по ?ids=1,2,3."""
+    if 'ids' in request.GET:
+        return batch(request)
+    return feed_page(request, Post.objects.all())
+
+
+@conditional_page(_group_state)
+@api_view('GET')
+def group_posts(request, slug):
+    group = Group.objects.filter(slug=slug).values_list('pk').first()
+    if group is None:
+        raise ApiError(404, 'Группа не найдена')
+    return feed_page(request, Post.objects.filter(group_id=group[0]))
+
+
+@conditional_page(_profile_state)
+@api_view('GET')
+def profile_posts(request, username):
+    author = User.objects.filter(username=username).values_list('pk').first()
+    if author is None:
+        raise ApiError(404, 'Автор не найден')
+    return feed_page(request, Post.objects.filter(author_id=author[0]))
+
+
+@conditional_page(_post_state)
+@api_view('GET')
+def post_detail(request, post_id):
+    fields = requested_fields(request)
+    row = Post.objects.filter(pk=post_id).values(
+        *{API_FIELDS[field] for field in fields},
+    ).first()
+    if row is None:
+        raise ApiError(404, 'Пост не найден')
+    return serialize([row], fields)[0]
+
+
+def validated_posts(request):
+    """Посты из тела запроса, проверенные как в PostForm.
+
+    Пачка принимается целиком или не принимается вовсе:
+    ошибки возвращаются по номеру поста в пачке.
+    """
+    try:
+        items = json.loads(request.body)['posts']
+    except (ValueError, KeyError, TypeError):
+        raise ApiError(400, 'Ожидается JSON вида {"posts": [...]}')
+    if not isinstance(items, list) or not items:
+        raise ApiError(400, 'posts — непустой список')
+    if len(items) > settings.API_MAX_LIMIT:
+        raise ApiError(400, f'Не больше {settings.API_MAX_LIMIT} постов')
+    posts = []
+    errors = {}
+    for number, item in enumerate(items):
+        form = PostForm(item if isinstance(item, dict) else {})
+        if not form.is_valid():
+            errors[number] = form.errors.get_json_data()
+            continue
+        post = form.save(commit=False)
+        post.author = request.user
+        posts.append(post)
+    if errors:
+        raise ApiError(400, 'Посты не прошли проверку', errors=errors)
+    return posts
+
+
+@api_view('POST', status=201)
+def posts_bulk(request):
+    """Создаёт пачку постов одним INSERT в одной транзакции."""
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Нужна авторизация')
+    posts = create_posts(validated_posts(request))
+    return {'ids': [post.pk for post in posts]}
@@ -0,0 +1,132 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .models import Post
+from .signals import (deleting_in_bulk, posts_bulk_created,
+                      posts_bulk_deleted, posts_bulk_updated)
+
+_pub_date_lock = threading.Lock()
+
+
+def _fill_pks(posts, using):
+    # SQLite не возвращает id из bulk_create. Внутри транзакции
+    # блокировка записи уже наша, так что последние id — наши посты.
+    pks = Post.objects.using(using).order_by('-pk').values_list(
+        'pk', flat=True,
+    )
+    for post, pk in zip(posts, reversed(pks[:len(posts)])):
+        post.pk = pk
+
+
+def _insert(posts, using):
+    Post.objects.using(using).bulk_create(posts)
+    if posts[0].pk is None and connections[using].vendor == 'sqlite':
+        _fill_pks(posts, using)
+
+
+def create_posts(posts):
+    """Вставляет несохранённые посты пачкой в одной транзакции."""
+    if not posts:
+        return posts
+    using = router.db_for_write(Post)
+    with transaction.atomic(using=using):
+        _insert(posts, using)
+        posts_bulk_created.send(sender=Post, posts=posts)
+    return posts
+
+
+@contextmanager
+def _keeping_pub_date():
+    # Поле общее для всех потоков процесса: пока оно выключено, пост,
+    # сохранённый без даты, упал бы на NOT NULL. Поэтому только для
+    # команд, где посты в это время больше никто не пишет.
+    field = Post._meta.get_field('pub_date')
+    with _pub_date_lock:
+        field.auto_now_add = False
+        try:
+            yield
+        finally:
+            field.auto_now_add = True
+
+
+def insert_dated_posts(posts):
+    """Вставляет посты пачкой, сохраняя заданную у них pub_date.
+
+    auto_now_add на время вставки выключается, и дата уходит в тот же
+    INSERT, без второго прохода по строкам. Пост без даты получает
+    текущее время. Сигналы не отправляются: это дело вызывающего.
+    Только для команд импорта и seed, см. _keeping_pub_date.
+    """
+    if not posts:
+        return posts
+    now = timezone.now()
+    for post in posts:
+        if post.pub_date is None:
+            post.pub_date = now
+    using = router.db_for_write(Post)
+    with transaction.atomic(using=using), _keeping_pub_date():
+        _insert(posts, using)
+    return posts
+
+
+def move_posts(queryset, group):
+    """Переносит посты в группу (или убирает из группы) одним UPDATE.
+
+    Возвращает число постов, у которых группа поменялась.
+    """
+    group_id = group and group.pk
+    targets = queryset.exclude(group_id=group_id) if group_id else (
+        queryset.filter(group__isnull=False)
+    )
+    using = router.db_for_write(Post)
+    with transaction.atomic(using=using):
+        rows = list(targets.values_list('pk', 'author_id', 'group_id'))
+        if not rows:
+            return 0
+        Post.objects.using(using).filter(pk__in=targets.values('pk')).update(
+            group_id=group_id, edited=timezone.now(),
+        )
+        posts_bulk_updated.send(
+            sender=Post,
+            posts=[
+                Post(pk=pk, author_id=author_id, group_id=group_id)
+                for pk, author_id, _ in rows
+            ],
+            old_relations=[
+                (author_id, old_group_id)
+                for _, author_id, old_group_id in rows
+            ],
+        )
+    return len(rows)
+
+
+def delete_posts(queryset):
+    """Удаляет посты с одним пересчётом счётчиков на всю пачку.
+
+    Удаляет queryset.delete(): Collector сам соблюдает on_delete связей
+    и зовёт чужие обработчики. Обработчики post_delete этого приложения
+    на каждый пост молчат, счётчики и кэш сдвигает posts_bulk_deleted.
+    """
+    using = router.db_for_write(Post)
+    with transaction.atomic(using=using):
+        rows = list(queryset.values_list('pk', 'author_id', 'group_id'))
+        if not rows:
+            return 0
+        token = deleting_in_bulk.set(True)
+        try:
+            Post.objects.using(using).filter(
+                pk__in=queryset.values('pk'),
+            ).delete()
+        finally:
+            deleting_in_bulk.reset(token)
+        posts_bulk_deleted.send(
+            sender=Post,
+            posts=[
+                Post(pk=pk, author_id=author_id, group_id=group_id)
+                for pk, author_id, group_id in rows
+            ],
+        )
+    return len(rows)
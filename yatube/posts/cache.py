@@ -0,0 +1,131 @@
+import time
+from functools import wraps
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from core.metrics import registry
+
+PAGE_CACHE_VERSION_KEY = 'posts:page_cache_version'
+
+
+def get_page_cache_version():
+    version = cache.get(PAGE_CACHE_VERSION_KEY)
+    if version is None:
+        cache.add(PAGE_CACHE_VERSION_KEY, time.time(), None)
+        version = cache.get(PAGE_CACHE_VERSION_KEY)
+    return version
+
+
+def bump_page_cache_version():
+    """Помечает все закэшированные страницы устаревшими."""
+    cache.set(PAGE_CACHE_VERSION_KEY, time.time(), None)
+
+
+def page_cache_key(view_name, full_path):
+    digest = md5(full_path.encode()).hexdigest()
+    return f'posts:page:{view_name}:{digest}'
+
+
+def _store(key, response, version):
+    now = time.time()
+    cache.set(
+        key,
+        {
+            'version': version,
+            'fresh_until': now + settings.PAGE_CACHE_TIMEOUT,
+            'status': response.status_code,
+            'content': response.content,
+            'headers': list(response.items()),
+        },
+        settings.PAGE_CACHE_TIMEOUT + settings.PAGE_CACHE_STALE_TIMEOUT,
+    )
+
+
+def _restore(request, entry, state):
+    response = HttpResponse(entry['content'], status=entry['status'])
+    for header, value in entry['headers']:
+        response[header] = value
+    response['X-Page-Cache'] = state
+    registry.inc('yatube_cache_total', cache='page', result=state)
+    # ETag и Last-Modified сохранены вместе со страницей: 304 отдаётся
+    # ровно для той копии, которую получил бы клиент, без запроса к базе.
+    return get_conditional_response(
+        request,
+        etag=response.get('ETag'),
+        last_modified=parse_http_date_safe(response.get('Last-Modified')),
+        response=response,
+    )
+
+
+def _is_fresh(entry, version):
+    return (
+        entry is not None
+        and entry['version'] == version
+        and entry['fresh_until'] > time.time()
+    )
+
+
+def _is_cacheable(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+    )
+
+
+def _wait_for_rebuild(key, lock_key, version):
+    deadline = time.time() + settings.PAGE_CACHE_LOCK_TIMEOUT
+    while time.time() < deadline:
+        time.sleep(settings.PAGE_CACHE_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None and entry['version'] == version:
+            return entry
+        if cache.get(lock_key) is None:
+            return None
+    return None
+
+
+def cache_anonymous_page(view):
+    """Кэширует страницу целиком для анонимных GET-запросов.
+
+    Запись помечается версией, которую сигналы Post и Group сдвигают
+    при каждой записи. Устаревшую страницу пересобирает один запрос
+    (блокировка через cache.add), остальные в это время получают
+    старую копию, а при её отсутствии ждут пересборку.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (
+            not settings.PAGE_CACHE_ENABLED
+            or request.method not in ('GET', 'HEAD')
+            or request.user.is_authenticated
+        ):
+            return view(request, *args, **kwargs)
+        key = page_cache_key(view.__name__, request.get_full_path())
+        version = get_page_cache_version()
+        entry = cache.get(key)
+        if _is_fresh(entry, version):
+            return _restore(request, entry, 'hit')
+        lock_key = f'{key}:lock'
+        if not cache.add(lock_key, 1, settings.PAGE_CACHE_LOCK_TIMEOUT):
+            if entry is not None:
+                return _restore(request, entry, 'stale')
+            entry = _wait_for_rebuild(key, lock_key, version)
+            if entry is not None:
+                return _restore(request, entry, 'hit')
+            return view(request, *args, **kwargs)
+        try:
+            response = view(request, *args, **kwargs)
+            if _is_cacheable(response):
+                _store(key, response, version)
+                response['X-Page-Cache'] = 'miss'
+                registry.inc('yatube_cache_total', cache='page', result='miss')
+            return response
+        finally:
+            cache.delete(lock_key)
+    return wrapper
@@ -0,0 +1,73 @@
+from datetime import timedelta
+from hashlib import md5
+
+from django.db.models import DateTimeField, Func, IntegerField, Subquery
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+
+def feed_state(posts, counter, *extra):
+    """Состояние ленты для conditional_page одним запросом к базе.
+
+    Новый пост сдвигает наибольшую pub_date, правка — наибольшую
+    edited, удаление — счётчик posts_count из строки counter (группы,
+    AuthorStats или FeedCounter), который сигналы сдвигают вместе
+    с записью поста. Даты берутся подзапросами с края индекса, счётчик —
+    по первичному ключу, так что лента не перебирается. Без counter
+    посты считаются COUNT — только для выборок в несколько строк:
+    одного поста или пачки по id. Для пустой ленты валидатора нет.
+    extra добавляется к ETag.
+    """
+    posts = posts.order_by()
+    edited = posts.order_by('-edited').values('edited')[:1]
+    if counter is None:
+        total = posts.annotate(
+            total=Func('pk', function='COUNT'),
+        ).values('total')
+    else:
+        total = counter.order_by().values('posts_count')[:1]
+    state = posts.order_by('-pub_date', '-pk').annotate(
+        last_edited=Subquery(edited, output_field=DateTimeField()),
+        total=Subquery(total, output_field=IntegerField()),
+    ).values_list('pub_date', 'last_edited', 'total').first()
+    if state is None:
+        return None
+    return max(state[:2]), (*state, *extra)
+
+
+def conditional_page(state):
+    """Отвечает 304 на If-None-Match / If-Modified-Since без рендера.
+
+    state(request, **kwargs) возвращает (время последнего изменения,
+    части ETag) или None, если валидатор не известен. Состояние
+    читается из базы, поэтому любой процесс видит запись другого.
+    ETag строится из частей, пользователя и полного пути.
+
+    Удаление поста и переименование группы или автора Last-Modified
+    не сдвигают: первое заметно только по ETag, второе — никак.
+    """
+    def get_state(request, *args, **kwargs):
+        if not hasattr(request, '_page_state'):
+            request._page_state = state(request, *args, **kwargs)
+        return request._page_state
+
+    def etag(request, *args, **kwargs):
+        current = get_state(request, *args, **kwargs)
+        if current is None:
+            return None
+        raw = '|'.join(map(repr, (
+            *current[1], request.user.pk, request.get_full_path(),
+        )))
+        return md5(raw.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        current = get_state(request, *args, **kwargs)
+        if current is None or current[0] is None:
+            return None
+        if timezone.now() - current[0] < timedelta(seconds=1):
+            # Last-Modified точен до секунды: правку в ту же секунду
+            # по If-Modified-Since не заметить. Пусть сверяют ETag.
+            return None
+        return current[0]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
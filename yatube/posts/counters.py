@@ -0,0 +1,174 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import AuthorStats, FeedCounter, Follow, Group, Post
+
+FEED_INDEX = 'index'
+
+
+def group_feed(group_id):
+    return f'group:{group_id}' if group_id else None
+
+
+def author_feed(author_id):
+    return f'author:{author_id}' if author_id else None
+
+
+def _real_author_stats(author_id):
+    return {
+        'posts_count': Post.objects.filter(author_id=author_id).count(),
+        'followers_count': Follow.objects.filter(author_id=author_id).count(),
+    }
+
+
+def _change_author_stats(author_id, field, delta):
+    if not author_id or not delta:
+        return
+    updated = AuthorStats.objects.filter(author_id=author_id).update(
+        **{field: Greatest(F(field) + delta, 0)},
+    )
+    if updated or delta < 0:
+        # Уменьшать нечего: строку с честными значениями заведёт первое
+        # чтение. Заводить её здесь нельзя — при каскадном удалении
+        # автора она пережила бы его самого.
+        return
+    # Строки ещё нет: заводим её сразу с честными значениями из базы.
+    try:
+        with transaction.atomic():
+            AuthorStats.objects.create(
+                author_id=author_id, **_real_author_stats(author_id),
+            )
+    except IntegrityError:
+        # Строку успел создать параллельный запрос.
+        _change_author_stats(author_id, field, delta)
+
+
+def change_author_posts_count(author_id, delta):
+    """Атомарно сдвигает счётчик постов автора на delta."""
+    _change_author_stats(author_id, 'posts_count', delta)
+
+
+def change_author_followers_count(author_id, delta):
+    """Атомарно сдвигает счётчик подписчиков автора на delta."""
+    _change_author_stats(author_id, 'followers_count', delta)
+
+
+def change_group_posts_count(group_id, delta):
+    """Атомарно сдвигает счётчик постов группы на delta."""
+    if not group_id or not delta:
+        return
+    Group.objects.filter(pk=group_id).update(
+        posts_count=Greatest(F('posts_count') + delta, 0),
+    )
+
+
+def change_index_posts_count(delta):
+    """Атомарно сдвигает счётчик постов главной ленты на delta."""
+    if not delta:
+        return
+    updated = FeedCounter.objects.filter(feed=FEED_INDEX).update(
+        posts_count=Greatest(F('posts_count') + delta, 0),
+    )
+    if updated or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            FeedCounter.objects.create(
+                feed=FEED_INDEX, posts_count=Post.objects.count(),
+            )
+    except IntegrityError:
+        change_index_posts_count(delta)
+
+
+def _feed_counter(feed):
+    kind, _, pk = feed.partition(':')
+    if kind == 'group':
+        return Group.objects.filter(pk=pk)
+    if kind == 'author':
+        return AuthorStats.objects.filter(author_id=pk)
+    return FeedCounter.objects.filter(feed=feed)
+
+
+def get_feed_count(feed):
+    """Число постов ленты из её счётчика или None, если счётчика нет."""
+    return _feed_counter(feed).values_list('posts_count', flat=True).first()
+
+
+def set_feed_count(feed, count):
+    """Записывает в счётчик ленты число, пересчитанное по базе."""
+    if _feed_counter(feed).update(posts_count=count) or feed != FEED_INDEX:
+        # Строку автора без счётчика заведёт get_author_posts_count.
+        return
+    FeedCounter.objects.get_or_create(
+        feed=feed, defaults={'posts_count': count},
+    )
+
+
+def get_author_posts_count(author):
+    """Число постов автора из счётчика без COUNT(*) по его постам."""
+    try:
+        return author.stats.posts_count
+    except AuthorStats.DoesNotExist:
+        stats, _ = AuthorStats.objects.get_or_create(
+            author=author, defaults=_real_author_stats(author.pk),
+        )
+        return stats.posts_count
+
+
+def _real_count(field, model=Post):
+    rows = model.objects.filter(**{field: OuterRef('pk')}).order_by()
+    return Coalesce(
+        Subquery(
+            rows.values(field).annotate(count=Count('pk')).values('count')
+        ),
+        0,
+    )
+
+
+def rebuild_counters():
+    """Пересчитывает все счётчики по базе.
+
+    Возвращает число авторов и групп, у которых счётчик разошёлся
+    с реальным количеством постов или подписчиков.
+    """
+    with transaction.atomic():
+        missing = {
+            *Post.objects.filter(author__stats__isnull=True)
+            .order_by()
+            .values_list('author_id', flat=True)
+            .distinct(),
+            *Follow.objects.filter(author__stats__isnull=True)
+            .values_list('author_id', flat=True)
+            .distinct(),
+        }
+        AuthorStats.objects.bulk_create(
+            (AuthorStats(author_id=author_id) for author_id in missing),
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        drifted_authors = (
+            AuthorStats.objects.annotate(
+                real=_real_count('author'),
+                real_followers=_real_count('author', Follow),
+            )
+            .exclude(
+                Q(posts_count=F('real'))
+                & Q(followers_count=F('real_followers'))
+            )
+            .count()
+        )
+        drifted_groups = (
+            Group.objects.annotate(real=_real_count('group'))
+            .exclude(posts_count=F('real'))
+            .count()
+        )
+        AuthorStats.objects.update(
+            posts_count=_real_count('author'),
+            followers_count=_real_count('author', Follow),
+        )
+        Group.objects.update(posts_count=_real_count('group'))
+        FeedCounter.objects.update_or_create(
+            feed=FEED_INDEX, defaults={'posts_count': Post.objects.count()},
+        )
+    return drifted_authors, drifted_groups
@@ -0,0 +1,57 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+EXPORT_FIELDS = ('id', 'text', 'pub_date', 'author', 'group')
+EXPORT_CHUNK_SIZE = 2000
+
+
+def export_rows(posts, chunk_size=EXPORT_CHUNK_SIZE):
+    """Построчно читает посты из базы, не держа выборку в памяти."""
+    rows = posts.order_by('-pub_date', '-id').values_list(
+        'pk', 'text', 'pub_date', 'author__username', 'group__slug',
+    )
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield dict(zip(EXPORT_FIELDS, row))
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.DictWriter(_Echo(), EXPORT_FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        row['pub_date'] = row['pub_date'].isoformat()
+        yield writer.writerow(row)
+
+
+def ndjson_lines(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+def export_lines(posts, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    rows = export_rows(posts, chunk_size)
+    if export_format == 'csv':
+        return csv_lines(rows)
+    return ndjson_lines(rows)
+
+
+def export_response(posts, filename, export_format):
+    response = StreamingHttpResponse(
+        (line.encode() for line in export_lines(posts, export_format)),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{export_format}"'
+    )
+    return response
@@ -7,7 +7,7 @@ from .models import Post
 class PostForm(ModelForm):
     class Meta:
         model = Post
-        fields = ['group', 'text']
+        fields = ['group', 'text', 'image']
         widgets = {
             'text': forms.Textarea(attrs={'cols': 70, 'rows': 15}),
         }
@@ -0,0 +1,57 @@
+import json
+
+from django.conf import settings
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from .models import Post
+from .signals import posts_bulk_updated
+
+
+def image_variants(post):
+    """Готовые варианты картинки поста: {вариант: [{url, width, height}]}."""
+    return json.loads(post.thumbnails) if post.thumbnails else {}
+
+
+def placeholder_size(variant):
+    """Ширина и высота заглушки: средний размер варианта."""
+    sizes = settings.POST_IMAGE_VARIANTS[variant]['sizes']
+    width, height = sizes[len(sizes) // 2].split('x')
+    return int(width), int(height)
+
+
+def make_thumbnails(post_id):
+    """Делает все варианты картинки поста и сохраняет их в посте."""
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author_id', 'group_id',
+    ).first()
+    if post is None or not post.image:
+        return
+    variants = {}
+    for variant, options in settings.POST_IMAGE_VARIANTS.items():
+        options = dict(options)
+        sizes = options.pop('sizes')
+        thumbnails = [
+            get_thumbnail(post.image, size, **options) for size in sizes
+        ]
+        variants[variant] = [
+            {
+                'url': thumbnail.url,
+                'width': thumbnail.width,
+                'height': thumbnail.height,
+            }
+            for thumbnail in thumbnails
+        ]
+    # Картинку могли заменить, пока шли варианты: тогда их сделает
+    # задача новой картинки.
+    # edited сдвигается: страницы с заглушкой перестают отвечать 304.
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnails=json.dumps(variants), edited=timezone.now(),
+    )
+    if updated:
+        # Закэшированные страницы с заглушкой должны перерисоваться.
+        posts_bulk_updated.send(
+            sender=Post,
+            posts=[post],
+            old_relations=[(post.author_id, post.group_id)],
+        )
@@ -0,0 +1,139 @@
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand
+
+from posts.search import FTS_MATCH, FTS_TABLE, install_fts, match_query
+
+SYLLABLES = (
+    'ка', 'ко', 'ту', 'ра', 'ми', 'ло', 'не', 'ст', 'пр', 'ва',
+    'ди', 'жу', 'сн', 'ре', 'то', 'ша', 'чи', 'бо', 'гу', 'ля',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск по тексту постов через LIKE и через FTS5 '
+        'на синтетической базе SQLite.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--words', type=int, default=20_000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--path',
+            help='Файл базы для прогона; по умолчанию временный.',
+        )
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        vocabulary = self.vocabulary(rnd, options['words'])
+        path = options['path'] or os.path.join(
+            tempfile.mkdtemp(), 'bench_search.sqlite3',
+        )
+        db = sqlite3.connect(path)
+        try:
+            self.fill(db, rnd, vocabulary, options['posts'])
+            terms = (
+                vocabulary[0],
+                vocabulary[len(vocabulary) // 10],
+                vocabulary[-1],
+            )
+            for term in terms:
+                self.compare(db, term, options['repeat'])
+        finally:
+            db.close()
+            if not options['path']:
+                os.remove(path)
+
+    def vocabulary(self, rnd, size):
+        words = set()
+        while len(words) < size:
+            words.add(''.join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4))))
+        return sorted(words)
+
+    def fill(self, db, rnd, vocabulary, total):
+        if db.execute(
+            "SELECT count(*) FROM sqlite_master WHERE name = 'posts_post'"
+        ).fetchone()[0]:
+            return
+        db.execute(
+            'CREATE TABLE posts_post (id integer PRIMARY KEY, text text)'
+        )
+        install_fts(db.cursor())
+        # Частоты слов по Ципфу: первые слова встречаются часто,
+        # хвост словаря — редко, как в живых текстах.
+        cum_weights = list(accumulate(
+            1 / rank for rank in range(1, len(vocabulary) + 1)
+        ))
+        started = time.perf_counter()
+        batch = 10_000
+        for start in range(0, total, batch):
+            rows = [
+                (' '.join(rnd.choices(
+                    vocabulary, cum_weights=cum_weights, k=30,
+                )),)
+                for _ in range(min(batch, total - start))
+            ]
+            db.executemany('INSERT INTO posts_post (text) VALUES (?)', rows)
+        db.commit()
+        self.stdout.write(
+            f'Создано постов: {total} '
+            f'за {time.perf_counter() - started:.1f} с'
+        )
+
+    def measure(self, db, sql, params, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = db.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), rows
+
+    def compare(self, db, term, repeat):
+        like_ms, like_rows = self.measure(
+            db,
+            'SELECT id FROM posts_post WHERE text LIKE ? '
+            'ORDER BY id DESC LIMIT 10',
+            (f'%{term}%',),
+            repeat,
+        )
+        like_count_ms, _ = self.measure(
+            db,
+            'SELECT count(*) FROM posts_post WHERE text LIKE ?',
+            (f'%{term}%',),
+            repeat,
+        )
+        fts_ms, fts_rows = self.measure(
+            db,
+            FTS_MATCH.replace('%s', '?') + ' ORDER BY rank LIMIT 10',
+            (match_query(term),),
+            repeat,
+        )
+        fts_recent_ms, _ = self.measure(
+            db,
+            FTS_MATCH.replace('%s', '?') + ' ORDER BY rowid DESC LIMIT 10',
+            (match_query(term),),
+            repeat,
+        )
+        fts_count_ms, _ = self.measure(
+            db,
+            f'SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?',
+            (match_query(term),),
+            repeat,
+        )
+        self.stdout.write(
+            f'{term!r}: LIKE страница {like_ms:.1f} мс, '
+            f'подсчёт {like_count_ms:.1f} мс; '
+            f'FTS5 страница {fts_ms:.1f} мс '
+            f'(новые первыми {fts_recent_ms:.1f} мс), '
+            f'подсчёт {fts_count_ms:.1f} мс '
+            f'(найдено на странице: {len(like_rows)} / {len(fts_rows)})'
+        )
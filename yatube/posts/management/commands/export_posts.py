@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_lines
+from posts.models import Group
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает посты автора или группы в CSV или NDJSON.'
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--author', help='username автора')
+        source.add_argument('--group', help='slug группы')
+        parser.add_argument(
+            '--format', choices=tuple(EXPORT_FORMATS), default='csv',
+        )
+        parser.add_argument(
+            '--output', help='Файл выгрузки; по умолчанию stdout.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        if options['author']:
+            owner = User.objects.filter(username=options['author']).first()
+        else:
+            owner = Group.objects.filter(slug=options['group']).first()
+        if owner is None:
+            raise CommandError('Автор или группа не найдены.')
+        lines = export_lines(
+            owner.posts.all(), options['format'], options['chunk_size'],
+        )
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(
+            options['output'], 'w', encoding='utf-8', newline='',
+        ) as output:
+            output.writelines(lines)
@@ -0,0 +1,278 @@
+import csv
+import json
+import os
+import time
+from collections import OrderedDict
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.bulk import insert_dated_posts
+from posts.models import Group, Post
+from posts.signals import posts_bulk_created
+
+User = get_user_model()
+
+
+class LookupCache:
+    """Ограниченный LRU-кэш соответствий имя -> id.
+
+    Недостающие имена добираются одним запросом на пачку,
+    а размер кэша не растёт с объёмом входных данных.
+    """
+
+    def __init__(self, queryset, field, maxsize):
+        self.queryset = queryset
+        self.field = field
+        self.maxsize = maxsize
+        self.ids = OrderedDict()
+
+    def resolve(self, names):
+        missing = {name for name in names if name not in self.ids}
+        if missing:
+            found = dict(self.queryset.filter(
+                **{f'{self.field}__in': missing}
+            ).values_list(self.field, 'pk'))
+            for name in missing:
+                self.ids[name] = found.get(name)
+        result = {}
+        for name in names:
+            self.ids.move_to_end(name)
+            result[name] = self.ids[name]
+        while len(self.ids) > self.maxsize:
+            self.ids.popitem(last=False)
+        return result
+
+
+def _read_jsonl(source, number, start):
+    for line in source:
+        current, number = number, number + 1
+        if current < start or not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            # Сюда же попадает UnicodeDecodeError.
+            yield current, source.tell(), None, f'строка {number}: {error}'
+            continue
+        if not isinstance(record, dict):
+            yield current, source.tell(), None, f'строка {number}: не объект'
+            continue
+        yield current, source.tell(), record, None
+
+
+def _decode_lines(source, errors):
+    """Строки файла в UTF-8; вместо нераскодированной — пустая строка.
+
+    Исключение внутри генератора закрыло бы его, и csv.reader молча
+    закончил бы файл. Поэтому ошибка откладывается в errors, а
+    читатель получает пустую строку и идёт дальше.
+    """
+    for line in source:
+        try:
+            yield line.decode('utf-8')
+        except UnicodeDecodeError as error:
+            errors.append(error)
+            yield '\n'
+
+
+def _read_csv(source, number, start, offset):
+    errors = []
+    reader = csv.reader(_decode_lines(source, errors))
+    header = next(reader, None)
+    if header is None:
+        return
+    # Заголовок прочитан, дальше — с позиции из контрольной точки.
+    source.seek(max(offset, source.tell()))
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as error:
+            errors.append(error)
+            row = None
+        if errors:
+            current, number = number, number + 1
+            if current >= start:
+                yield current, source.tell(), None, str(errors[0])
+            errors.clear()
+            continue
+        if not row:
+            continue
+        current, number = number, number + 1
+        if current >= start:
+            yield current, source.tell(), dict(zip(header, row)), None
+
+
+def read_records(path, file_format, start=0, position=(0, 0)):
+    """Отдаёт (номер записи, смещение за ней, запись, ошибка) из JSONL или CSV.
+
+    position — (номер записи, смещение в байтах) из контрольной точки:
+    чтение продолжается с seek(), не разбирая начало файла заново.
+    Записи до start пропускаются. Вместо записи, которую не удалось
+    разобрать, отдаётся None и текст ошибки.
+    """
+    number, offset = position
+    with open(path, 'rb') as source:
+        if file_format == 'csv':
+            yield from _read_csv(source, number, start, offset)
+            return
+        source.seek(offset)
+        yield from _read_jsonl(source, number, start)
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково импортирует посты из JSONL или CSV с полями text, '
+        'author (username), group (slug, необязательно) и pub_date '
+        '(ISO 8601, необязательно).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format',
+            choices=('jsonl', 'csv'),
+            help='Формат файла; по умолчанию по расширению.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--batches-per-transaction',
+            type=int,
+            default=10,
+            help='Сколько пачек коммитить одной транзакцией.',
+        )
+        parser.add_argument(
+            '--start',
+            type=int,
+            default=0,
+            help='Номер записи, с которой начать.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help=(
+                'Файл, где хранятся номер следующей записи и её смещение '
+                'в файле после каждой транзакции; при повторном запуске '
+                'импорт продолжится с них.'
+            ),
+        )
+        parser.add_argument('--lookup-cache-size', type=int, default=100_000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден.')
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl'
+        )
+        self.checkpoint = options['checkpoint']
+        number, offset = self.read_checkpoint()
+        start = max(options['start'], number)
+        # Без смещения файл читается с начала, записи до start пропускаются.
+        position = (number, offset) if offset else (0, 0)
+        self.authors = LookupCache(
+            User.objects.all(), 'username', options['lookup_cache_size'],
+        )
+        self.groups = LookupCache(
+            Group.objects.all(), 'slug', options['lookup_cache_size'],
+        )
+        self.created = self.skipped = 0
+        self.started = time.monotonic()
+
+        records = read_records(path, file_format, start, position)
+        batch_size = options['batch_size']
+        chunk_size = batch_size * options['batches_per_transaction']
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            with transaction.atomic():
+                for first in range(0, len(chunk), batch_size):
+                    self.import_batch(chunk[first:first + batch_size])
+            number, offset = chunk[-1][:2]
+            self.write_checkpoint(number + 1, offset)
+            self.report(number + 1)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: создано {self.created}, пропущено {self.skipped}.'
+        ))
+
+    def import_batch(self, batch):
+        records = []
+        for number, _, record, error in batch:
+            if error is None:
+                records.append((number, record))
+            else:
+                self.skip(number, error)
+        authors = self.authors.resolve(
+            {record.get('author') or '' for _, record in records}
+        )
+        groups = self.groups.resolve(
+            {record.get('group') or '' for _, record in records} - {''}
+        )
+        posts = []
+        for number, record in records:
+            post = self.build_post(record, authors, groups)
+            if post is None:
+                self.skip(number, repr(record))
+                continue
+            posts.append(post)
+        if posts:
+            insert_dated_posts(posts)
+            posts_bulk_created.send(sender=Post, posts=posts)
+        self.created += len(posts)
+
+    def skip(self, number, reason):
+        self.skipped += 1
+        self.stderr.write(f'Запись {number} пропущена: {reason}')
+
+    def build_post(self, record, authors, groups):
+        author_id = authors.get(record.get('author') or '')
+        group_slug = record.get('group') or ''
+        group_id = groups.get(group_slug) if group_slug else None
+        pub_date = record.get('pub_date') or None
+        if pub_date is not None:
+            pub_date = parse_datetime(pub_date)
+            if pub_date is not None and timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date, timezone.utc)
+        if (
+            not record.get('text')
+            or author_id is None
+            or (group_slug and group_id is None)
+            or (record.get('pub_date') and pub_date is None)
+        ):
+            return None
+        return Post(
+            text=record['text'],
+            author_id=author_id,
+            group_id=group_id,
+            pub_date=pub_date or timezone.now(),
+        )
+
+    def read_checkpoint(self):
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return 0, 0
+        with open(self.checkpoint) as checkpoint:
+            values = [int(value) for value in checkpoint.read().split()]
+        number, offset = (values + [0, 0])[:2]
+        return number, offset
+
+    def write_checkpoint(self, number, offset):
+        if not self.checkpoint:
+            return
+        temporary = f'{self.checkpoint}.tmp'
+        with open(temporary, 'w') as checkpoint:
+            checkpoint.write(f'{number} {offset}')
+        os.replace(temporary, self.checkpoint)
+
+    def report(self, offset):
+        elapsed = time.monotonic() - self.started
+        rate = self.created / elapsed if elapsed else 0
+        self.stdout.write(
+            f'Запись {offset}: создано {self.created}, '
+            f'пропущено {self.skipped}, {rate:.0f} постов/с'
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов авторов и групп по базе.'
+
+    def handle(self, *args, **options):
+        drifted_authors, drifted_groups = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Счётчики пересчитаны. Расходились: авторов — '
+            f'{drifted_authors}, групп — {drifted_groups}.'
+        ))
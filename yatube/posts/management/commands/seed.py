@@ -0,0 +1,193 @@
+import random
+import time
+from bisect import bisect
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from faker import Faker
+
+from posts.bulk import insert_dated_posts
+from posts.cache import bump_page_cache_version
+from posts.counters import rebuild_counters
+from posts.models import Group, Post
+from posts.search import FTS_TABLE, fts_available, install_fts, uninstall_fts
+
+User = get_user_model()
+
+
+def zipf_cum_weights(size, exponent):
+    """Накопленные веса степенного закона: у первых — львиная доля."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)
+    ))
+
+
+def weighted_index(rnd, cum_weights):
+    return bisect(cum_weights, rnd.random() * cum_weights[-1])
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует воспроизводимый набор пользователей, групп и постов '
+        'с перекосом как в живых данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument(
+            '--days', type=int, default=3 * 365,
+            help='За сколько дней до сегодня распределить посты.',
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель степенного закона для авторов и групп.',
+        )
+        parser.add_argument(
+            '--ungrouped', type=float, default=0.3,
+            help='Доля постов без группы.',
+        )
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Префикс имён пользователей и slug групп.',
+        )
+        parser.add_argument('--password', default='password')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.rnd = random.Random(options['seed'])
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(options['seed'])
+        started = time.monotonic()
+
+        author_ids = self.create_users()
+        if options['posts'] and not author_ids:
+            raise CommandError('Постам нужен хотя бы один автор.')
+        group_ids = self.create_groups()
+        deferred_search = self.drop_search_triggers()
+        try:
+            self.create_posts(author_ids, group_ids)
+        finally:
+            if deferred_search:
+                self.stdout.write('Перестройка поискового индекса...')
+                with connection.cursor() as cursor:
+                    install_fts(cursor, rebuild=True)
+
+        # Числа постов лент — строки счётчиков в базе (главная, группы,
+        # авторы), пересчитываются все разом.
+        drifted = rebuild_counters()
+        bump_page_cache_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с. '
+            f'Пересчитаны счётчики: авторов {drifted[0]}, групп {drifted[1]}.'
+        ))
+
+    def create_users(self):
+        prefix = self.options['prefix']
+        password = make_password(self.options['password'])
+        users = []
+        for number in range(self.options['users']):
+            users.append(User(
+                username=f'{prefix}_user_{number}',
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                email=f'{prefix}_user_{number}@example.com',
+                password=password,
+            ))
+        # Размер пачки подбирает Django: явный batch_size не учитывает
+        # ограничение SQLite на число строк в одном INSERT.
+        User.objects.bulk_create(users, ignore_conflicts=True)
+        ids = dict(User.objects.filter(
+            username__startswith=f'{prefix}_user_',
+        ).values_list('username', 'pk'))
+        # Порядок авторов задаёт их «популярность» в законе Ципфа.
+        author_ids = [ids[user.username] for user in users]
+        self.rnd.shuffle(author_ids)
+        return author_ids
+
+    def create_groups(self):
+        prefix = self.options['prefix']
+        groups = [
+            Group(
+                title=self.fake.catch_phrase()[:200],
+                slug=f'{prefix}-group-{number}',
+                description=self.fake.paragraph(),
+            )
+            for number in range(self.options['groups'])
+        ]
+        Group.objects.bulk_create(groups, ignore_conflicts=True)
+        ids = dict(Group.objects.filter(
+            slug__startswith=f'{prefix}-group-',
+        ).values_list('slug', 'pk'))
+        return [ids[group.slug] for group in groups]
+
+    def drop_search_triggers(self):
+        # Построчные триггеры FTS тормозят вставку; индекс дешевле
+        # перестроить целиком после генерации.
+        if not fts_available():
+            return False
+        if FTS_TABLE not in connection.introspection.table_names():
+            return False
+        with connection.cursor() as cursor:
+            uninstall_fts(cursor, keep_table=True)
+        return True
+
+    def texts(self):
+        sentences = [self.fake.sentence(nb_words=12) for _ in range(5000)]
+        while True:
+            yield ' '.join(
+                self.rnd.choices(sentences, k=self.rnd.randint(1, 4))
+            )
+
+    def generate_posts(self, author_ids, group_ids):
+        total = self.options['posts']
+        author_weights = zipf_cum_weights(
+            len(author_ids), self.options['skew'],
+        )
+        group_weights = zipf_cum_weights(
+            max(len(group_ids), 1), self.options['skew'],
+        )
+        end = timezone.now().replace(microsecond=0)
+        span = timedelta(days=self.options['days'])
+        start = end - span
+        step = span / max(total, 1)
+        texts = self.texts()
+        for number in range(total):
+            group_id = None
+            if group_ids and self.rnd.random() >= self.options['ungrouped']:
+                group_id = group_ids[weighted_index(self.rnd, group_weights)]
+            # Даты растут вместе с id, как у постов, созданных вживую.
+            pub_date = start + step * (number + self.rnd.random())
+            yield Post(
+                text=next(texts),
+                author_id=author_ids[
+                    weighted_index(self.rnd, author_weights)
+                ],
+                group_id=group_id,
+                pub_date=pub_date,
+            )
+
+    def create_posts(self, author_ids, group_ids):
+        batch_size = self.options['batch_size']
+        total = self.options['posts']
+        posts = self.generate_posts(author_ids, group_ids)
+        started = time.monotonic()
+        created = 0
+        while created < total:
+            batch = [
+                next(posts) for _ in range(min(batch_size, total - created))
+            ]
+            insert_dated_posts(batch)
+            created += len(batch)
+            rate = created / (time.monotonic() - started)
+            self.stdout.write(
+                f'Постов: {created}/{total}, {rate:.0f} в секунду'
+            )
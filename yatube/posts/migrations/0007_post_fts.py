@@ -0,0 +1,28 @@
+from django.db import migrations
+
+from posts.search import install_fts, uninstall_fts
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        install_fts(cursor, rebuild=True)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        uninstall_fts(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:55
+
+from django.db import migrations, models
+
+
+def fill_index_counter(apps, schema_editor):
+    FeedCounter = apps.get_model('posts', 'FeedCounter')
+    Post = apps.get_model('posts', 'Post')
+    FeedCounter.objects.create(feed='index', posts_count=Post.objects.count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_edited_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedCounter',
+            fields=[
+                ('feed', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+            ],
+        ),
+        migrations.RunPython(fill_index_counter, migrations.RunPython.noop),
+    ]
@@ -10,11 +10,55 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество постов',
+    )
 
     def __str__(self):
         return self.title
 
 
+class AuthorStats(models.Model):
+    """Счётчики автора, которые дорого считать на каждый запрос."""
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество постов',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписчиков',
+    )
+
+    def __str__(self):
+        return f'{self.author}: {self.posts_count}'
+
+
+class FeedCounter(models.Model):
+    """Число постов ленты, у которой нет своей строки со счётчиком.
+
+    Группы и авторы держат счётчик в своих строках, здесь — главная.
+    """
+
+    feed = models.CharField(max_length=50, primary_key=True)
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество постов',
+    )
+
+    def __str__(self):
+        return f'{self.feed}: {self.posts_count}'
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст поста',
@@ -24,6 +68,10 @@ class Post(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации',
     )
+    edited = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -39,9 +87,125 @@ class Post(models.Model):
         verbose_name='Группа',
         help_text='Группа, к которой будет относиться пост',
     )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True,
+    )
+    # Готовые уменьшенные копии картинки в JSON, их пишет воркер.
+    thumbnails = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Варианты картинки',
+    )
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        # Индексы под сортировку лент: главная, профиль и группа
+        # читают готовый диапазон индекса без сортировки в памяти.
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='post_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_pub_date_idx',
+            ),
+            # Последняя правка ленты для ETag — с края индекса.
+            models.Index(fields=('-edited',), name='post_edited_idx'),
+            models.Index(
+                fields=('author', '-edited'),
+                name='post_author_edited_idx',
+            ),
+            models.Index(
+                fields=('group', '-edited'),
+                name='post_group_edited_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:CHARACTERS]
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор',
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='no_self_follow',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в ленте подписок читателя, разложенный заранее.
+
+    pub_date копируется из поста: лента читается одним диапазоном
+    индекса (owner, -pub_date, -post) без JOIN ради сортировки.
+    """
+
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('owner', 'post'),
+                name='unique_timeline_entry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('owner', '-pub_date', '-post'),
+                name='timeline_owner_pub_date_idx',
+            ),
+            models.Index(
+                fields=('owner', 'author'),
+                name='timeline_owner_author_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.owner}: {self.post_id}'
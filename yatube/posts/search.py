@@ -0,0 +1,147 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.functional import cached_property
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+
+# Индекс FTS5 с внешним содержимым: сам текст лежит в posts_post,
+# а триггеры держат индекс в согласии с таблицей.
+FTS_SCHEMA = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text,
+        content='posts_post',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+)
+FTS_TRIGGERS = (
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+)
+FTS_REBUILD = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+FTS_DROP_TRIGGERS = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+)
+FTS_DROP = FTS_DROP_TRIGGERS + (f'DROP TABLE IF EXISTS {FTS_TABLE}',)
+FTS_MATCH = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+
+
+def install_fts(cursor, rebuild=False):
+    """Создаёт индекс и триггеры, если их нет.
+
+    Django пересоздаёт таблицу posts_post при изменении её схемы
+    и теряет триггеры, поэтому установка повторяется после migrate.
+    """
+    for statement in FTS_SCHEMA + FTS_TRIGGERS:
+        cursor.execute(statement)
+    if rebuild:
+        cursor.execute(FTS_REBUILD)
+
+
+def uninstall_fts(cursor, keep_table=False):
+    for statement in FTS_DROP_TRIGGERS if keep_table else FTS_DROP:
+        cursor.execute(statement)
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def match_query(query):
+    """Запрос FTS5 из пользовательской строки: все слова, как фразы.
+
+    Кавычки снимают особый смысл операторов вроде NOT и *,
+    так что ввод пользователя не ломает синтаксис MATCH.
+    """
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def matching_ids(query):
+    """Подзапрос id постов, подходящих под запрос, для filter(pk__in=...)."""
+    return RawSQL(FTS_MATCH, (match_query(query),))
+
+
+class SearchResults:
+    """Результаты поиска в порядке релевантности для Paginator.
+
+    Срез выбирает из индекса только id нужной страницы,
+    посты подгружаются одним запросом.
+    """
+
+    ordered = True
+
+    def __init__(self, query):
+        self.match = match_query(query)
+
+    @cached_property
+    def total(self):
+        if not self.match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s',
+                (self.match,),
+            )
+            return cursor.fetchone()[0]
+
+    def count(self):
+        return self.total
+
+    @property
+    def order(self):
+        # bm25 считается по каждому совпадению: для слова, которое есть
+        # почти в каждом посте, это секунды. Тогда выдаём новые посты.
+        if self.total > settings.SEARCH_RANK_LIMIT:
+            return 'rowid DESC'
+        return 'rank'
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        if not self.match:
+            return []
+        start = key.start or 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{FTS_MATCH} ORDER BY {self.order} LIMIT %s OFFSET %s',
+                (self.match, key.stop - start, start),
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search_posts(query):
+    """Посты по запросу: FTS5 на SQLite, иначе LIKE по тексту."""
+    if fts_available():
+        return SearchResults(query)
+    if not query.strip():
+        return Post.objects.none()
+    return Post.objects.select_related('author', 'group').filter(
+        text__icontains=query,
+    )
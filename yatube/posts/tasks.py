@@ -0,0 +1,28 @@
+from core.queue import task
+
+from .timeline import (backfill_follower_timelines, backfill_timeline,
+                       fan_out_posts)
+
+
+@task(batch_size=100)
+def fan_out(batches):
+    """Раскладывает по лентам посты из нескольких задач разом."""
+    fan_out_posts([pk for batch in batches for pk in batch['post_ids']])
+
+
+@task
+def backfill(user_id, author_id):
+    backfill_timeline(user_id, author_id)
+
+
+@task
+def backfill_followers(author_id):
+    backfill_follower_timelines(author_id)
+
+
+@task(max_attempts=3)
+def generate_thumbnails(post_id):
+    # Импорт здесь: images зависит от signals, а signals — от задач.
+    from .images import make_thumbnails
+
+    make_thumbnails(post_id)
@@ -0,0 +1,29 @@
+from django import template
+
+from posts.images import image_variants, placeholder_size
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/post_image.html')
+def post_image(post, variant):
+    """Картинка поста со srcset или заглушка, пока варианты не готовы.
+
+    Шаблон ничего не уменьшает сам: варианты делает воркер,
+    так что холодный кэш картинок не замедляет ленту.
+    """
+    if not post.image:
+        return {}
+    sizes = image_variants(post).get(variant)
+    if not sizes:
+        width, height = placeholder_size(variant)
+        return {'placeholder': True, 'width': width, 'height': height}
+    main = sizes[len(sizes) // 2]
+    return {
+        'src': main['url'],
+        'srcset': ', '.join(
+            f'{size["url"]} {size["width"]}w' for size in sizes
+        ),
+        'width': main['width'],
+        'height': main['height'],
+    }
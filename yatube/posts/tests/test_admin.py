@@ -0,0 +1,95 @@
+from django.contrib.admin import helpers
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostAdminActionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass',
+        )
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Старая группа', slug='old', description='Описание',
+        )
+        cls.group_1 = Group.objects.create(
+            title='Новая группа', slug='new', description='Описание',
+        )
+        cls.url = reverse('admin:posts_post_changelist')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.posts = [
+            Post.objects.create(
+                author=self.author, text=f'Пост {i}', group=self.group,
+            )
+            for i in range(3)
+        ]
+
+    def act(self, action, posts, **data):
+        return self.client.post(self.url, {
+            'action': action,
+            helpers.ACTION_CHECKBOX_NAME: [post.pk for post in posts],
+            **data,
+        })
+
+    def assertCounts(self, old, new):
+        self.group.refresh_from_db()
+        self.group_1.refresh_from_db()
+        self.assertEqual(
+            (self.group.posts_count, self.group_1.posts_count), (old, new),
+        )
+
+    def test_move_to_group(self):
+        """Перенос в группу — один UPDATE, счётчики и edited сдвигаются."""
+
+        with CaptureQueriesContext(connection) as queries:
+            self.act('move_to_group', self.posts[:2], group=self.group_1.pk)
+        updates = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE "posts_post"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            Post.objects.filter(group=self.group_1).count(), 2,
+        )
+        self.assertCounts(1, 2)
+        moved = Post.objects.get(pk=self.posts[0].pk)
+        self.assertGreater(moved.edited, self.posts[0].edited)
+
+    def test_clear_group(self):
+        """Посты убираются из группы одним действием."""
+
+        self.act('clear_group', self.posts[1:])
+        self.assertEqual(
+            Post.objects.filter(group__isnull=True).count(), 2,
+        )
+        self.assertCounts(1, 0)
+
+    def test_delete_selected(self):
+        """Удаление спрашивает подтверждение и чинит счётчики пачкой."""
+
+        response = self.act('delete_selected', self.posts[:2])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Post.objects.count(), 3)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.act('delete_selected', self.posts[:2], post='yes')
+        group_updates = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE "posts_group"')
+        ]
+        self.assertEqual(len(group_updates), 1)
+        self.assertRedirects(response, self.url)
+        self.assertEqual(list(Post.objects.all()), [self.posts[2]])
+        self.assertCounts(1, 0)
+        self.assertEqual(self.author.stats.posts_count, 1)
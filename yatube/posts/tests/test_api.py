@@ -0,0 +1,183 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                text=f'Пост {i}',
+                group=cls.group if i % 2 else None,
+            )
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def get(self, name, kwargs=None, **params):
+        response = self.client.get(reverse(name, kwargs=kwargs), params)
+        return response, json.loads(response.content)
+
+    def test_feed_cursor_pagination(self):
+        """Лента листается курсором: запрос валидатора и запрос страницы."""
+
+        with self.assertNumQueries(2):
+            response, first = self.get('api:posts', limit=2)
+        self.assertNotIn(b', ', response.content)
+        self.assertEqual(
+            [post['text'] for post in first['results']], ['Пост 4', 'Пост 3'],
+        )
+        self.assertIsNone(first['previous'])
+        _, second = self.get('api:posts', limit=2, after=first['next'])
+        self.assertEqual(
+            [post['text'] for post in second['results']],
+            ['Пост 2', 'Пост 1'],
+        )
+        _, back = self.get('api:posts', limit=2, before=second['previous'])
+        self.assertEqual(back['results'], first['results'])
+
+    def test_sparse_fields(self):
+        """fields оставляет в ответе только нужные поля."""
+
+        _, data = self.get(
+            'api:group_posts', {'slug': self.group.slug}, fields='id,group',
+        )
+        self.assertEqual(data['results'], [
+            {'id': self.posts[3].pk, 'group': 'test-slug'},
+            {'id': self.posts[1].pk, 'group': 'test-slug'},
+        ])
+        response, data = self.get('api:posts', fields='id,secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', data['detail'])
+
+    def test_batch_fetch(self):
+        """ids отдаёт посты в заданном порядке запросом после валидатора."""
+
+        ids = [self.posts[2].pk, 999, self.posts[0].pk]
+        with self.assertNumQueries(2):
+            _, data = self.get(
+                'api:posts', ids=','.join(map(str, ids)), fields='id,author',
+            )
+        self.assertEqual(data['results'], [
+            {'id': self.posts[2].pk, 'author': 'auth'},
+            {'id': self.posts[0].pk, 'author': 'auth'},
+        ])
+        self.assertEqual(data['missing'], [999])
+
+    def test_detail_and_etag(self):
+        """Пост отдаётся с ETag и отвечает 304, пока не изменился.
+
+        Для 304 хватает одного запроса состояния поста к базе.
+        """
+
+        kwargs = {'post_id': self.posts[0].pk}
+        response, data = self.get('api:post_detail', kwargs)
+        self.assertEqual(data['text'], 'Пост 0')
+        self.assertEqual(data['author'], 'auth')
+        url = reverse('api:post_detail', kwargs=kwargs)
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        post = Post.objects.get(pk=self.posts[0].pk)
+        post.text = 'Изменённый пост'
+        post.save()
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+
+    def test_not_found(self):
+        """Несуществующие объекты дают 404 в JSON."""
+
+        for name, kwargs in (
+            ('api:post_detail', {'post_id': 999}),
+            ('api:group_posts', {'slug': 'missing'}),
+            ('api:profile_posts', {'username': 'missing'}),
+        ):
+            with self.subTest(name=name):
+                response, data = self.get(name, kwargs)
+                self.assertEqual(response.status_code, 404)
+                self.assertIn('detail', data)
+
+
+class BulkCreateApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='partner')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.url = reverse('api:posts_bulk')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def post(self, data):
+        response = self.client.post(
+            self.url, json.dumps(data), content_type='application/json',
+        )
+        return response, json.loads(response.content)
+
+    def test_bulk_create(self):
+        """Пачка постов создаётся целиком, счётчики сходятся."""
+
+        response, data = self.post({'posts': [
+            {'text': 'Первый', 'group': self.group.pk},
+            {'text': 'Второй'},
+            {'text': 'Третий', 'group': self.group.pk},
+        ]})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(Post.objects.filter(pk__in=data['ids']).order_by(
+                'pk',
+            ).values_list('text', flat=True)),
+            ['Первый', 'Второй', 'Третий'],
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 2)
+        self.assertEqual(self.user.stats.posts_count, 3)
+
+    def test_invalid_batch_creates_nothing(self):
+        """Одна ошибка в пачке отменяет её целиком."""
+
+        response, data = self.post({'posts': [
+            {'text': 'Хороший'},
+            {'text': ''},
+            {'text': 'Чужая группа', 'group': 999},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(data['errors']), {'1', '2'})
+        self.assertIn('text', data['errors']['1'])
+        self.assertIn('group', data['errors']['2'])
+        self.assertFalse(Post.objects.exists())
+
+    def test_bulk_create_requires_login_and_post(self):
+        """Анонимам — 401, GET — 405."""
+
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+        self.client.logout()
+        response, _ = self.post({'posts': [{'text': 'Аноним'}]})
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Post.objects.exists())
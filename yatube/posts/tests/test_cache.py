@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.cache import bump_page_cache_version, page_cache_key
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_anonymous_pages_are_cached(self):
+        """Повторный запрос гостя отдаётся из кэша без запросов к базе."""
+
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response['X-Page-Cache'], 'miss')
+                with self.assertNumQueries(0):
+                    cached = self.guest_client.get(url)
+                self.assertEqual(cached['X-Page-Cache'], 'hit')
+                self.assertEqual(cached.content, response.content)
+
+    def test_query_string_is_part_of_key(self):
+        """Разные страницы ленты кэшируются отдельно."""
+
+        self.guest_client.get(self.urls[0])
+        response = self.guest_client.get(self.urls[0], {'page': 2})
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+
+    def test_post_write_invalidates_pages(self):
+        """Новый пост сразу виден в закэшированной ленте."""
+
+        self.guest_client.get(self.urls[0])
+        Post.objects.create(author=self.user, text='Свежий пост')
+        response = self.guest_client.get(self.urls[0])
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Свежий пост')
+
+    def test_authorized_user_gets_live_page(self):
+        """Авторизованный пользователь не получает страницу гостя."""
+
+        self.guest_client.get(self.urls[0])
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        response = authorized_client.get(self.urls[0])
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertContains(response, 'Выйти')
+
+    def test_stale_page_served_while_rebuilding(self):
+        """Пока один запрос пересобирает страницу, другие получают копию."""
+
+        self.guest_client.get(self.urls[0])
+        bump_page_cache_version()
+        cache.add(f'{page_cache_key("index", self.urls[0])}:lock', 1)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(self.urls[0])
+        self.assertEqual(response['X-Page-Cache'], 'stale')
+
+    @override_settings(PAGE_CACHE_LOCK_TIMEOUT=0.2)
+    def test_waiting_for_lock_falls_back_to_render(self):
+        """Без копии запрос ждёт пересборку, а потом рисует сам."""
+
+        cache.add(f'{page_cache_key("index", self.urls[0])}:lock', 1)
+        response = self.guest_client.get(self.urls[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.post.text)
@@ -0,0 +1,176 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        # Last-Modified отдаётся, только когда секунда правки прошла.
+        Post.objects.update(
+            pub_date=timezone.now() - timedelta(days=1),
+            edited=timezone.now() - timedelta(days=1),
+        )
+        cls.feeds = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user.username}),
+        )
+        cls.detail = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk},
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def revalidate(self, url, response, client=None):
+        return (client or self.guest_client).get(
+            url, HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+
+    def test_unchanged_pages_answer_304_without_render(self):
+        """Неизменная страница отвечает 304 одним запросом к базе."""
+
+        for url in (*self.feeds, self.detail):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn('Last-Modified', response)
+                # Кэш другого процесса пуст: валидатор берётся из базы.
+                cache.clear()
+                with self.assertNumQueries(1):
+                    revalidated = self.revalidate(url, response)
+                self.assertEqual(revalidated.status_code, 304)
+                revalidated = self.guest_client.get(
+                    url,
+                    HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+                )
+                self.assertEqual(revalidated.status_code, 304)
+
+    def test_feed_validator_does_not_count_posts(self):
+        """Валидатор ленты берёт удаления из счётчика, а не из COUNT."""
+
+        for url in self.feeds:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    revalidated = self.revalidate(
+                        url, response, self.authorized_client,
+                    )
+                self.assertEqual(revalidated.status_code, 304)
+                self.assertFalse(
+                    any('COUNT(' in query['sql'] for query in queries),
+                )
+
+    def test_cached_page_answers_304_without_queries(self):
+        """Страница из кэша отвечает 304 по сохранённым с ней валидаторам."""
+
+        for url in (*self.feeds, self.detail):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    revalidated = self.revalidate(url, response)
+                self.assertEqual(revalidated.status_code, 304)
+                self.assertEqual(revalidated['ETag'], response['ETag'])
+
+    def test_new_post_changes_validators(self):
+        """Новый пост автора меняет ETag его лент и страниц постов."""
+
+        responses = {
+            url: self.guest_client.get(url)
+            for url in (*self.feeds, self.detail)
+        }
+        Post.objects.create(
+            author=self.user, text='Ещё пост', group=self.group,
+        )
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.revalidate(url, response).status_code, 200,
+                )
+
+    def test_edit_changes_detail_and_edited(self):
+        """Правка поста сдвигает edited, но не pub_date, и ETag страницы."""
+
+        response = self.guest_client.get(self.detail)
+        post = Post.objects.get(pk=self.post.pk)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            {'text': 'Исправленный пост', 'group': self.group.pk},
+        )
+        edited = Post.objects.get(pk=post.pk)
+        self.assertEqual(edited.pub_date, post.pub_date)
+        self.assertGreater(edited.edited, post.edited)
+        self.assertEqual(
+            self.revalidate(self.detail, response).status_code, 200,
+        )
+
+    def test_etag_depends_on_user(self):
+        """Гость и автор получают разные ETag одной страницы."""
+
+        url = self.feeds[0]
+        guest = self.guest_client.get(url)
+        author = self.authorized_client.get(url)
+        self.assertNotEqual(guest['ETag'], author['ETag'])
+        self.assertEqual(
+            self.revalidate(url, guest, self.authorized_client).status_code,
+            200,
+        )
+
+    def test_delete_changes_feed_etag(self):
+        """Удаление поста меняет ETag ленты, хоть даты и не растут."""
+
+        old = Post.objects.create(author=self.user, text='Старый пост')
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=timezone.now() - timedelta(days=2),
+            edited=timezone.now() - timedelta(days=2),
+        )
+        url = self.feeds[0]
+        response = self.guest_client.get(url)
+        old.delete()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_fresh_change_has_no_last_modified(self):
+        """В секунду правки Last-Modified не отдаётся: сверяется ETag."""
+
+        Post.objects.create(author=self.user, text='Свежий пост')
+        response = self.guest_client.get(self.feeds[0])
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('ETag', response)
+
+    def test_follow_changes_profile_etag(self):
+        """Подписка меняет ETag страницы автора для подписчика."""
+
+        reader = User.objects.create_user(username='reader')
+        client = Client()
+        client.force_login(reader)
+        url = self.feeds[2]
+        response = client.get(url)
+        Follow.objects.create(user=reader, author=self.user)
+        self.assertEqual(
+            self.revalidate(url, response, client).status_code, 200,
+        )
@@ -0,0 +1,154 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from core.models import Task
+from posts.models import AuthorStats, Follow, Post, TimelineEntry
+from posts.tasks import fan_out
+from posts.timeline import fan_out_posts
+
+User = get_user_model()
+
+
+@override_settings(TASKS_EAGER=True)
+class FollowTimelineTests(TransactionTestCase):
+    """Подписки и лента подписок: раскладка срабатывает после коммита."""
+
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+        self.stranger = User.objects.create_user(username='stranger')
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def follow(self, author):
+        return self.client.post(
+            reverse('posts:profile_follow', kwargs={'username': author}),
+        )
+
+    def feed(self, **params):
+        response = self.client.get(reverse('posts:follow_index'), params)
+        return response.context['page_obj']
+
+    def test_follow_and_unfollow(self):
+        """Подписка и отписка меняют ленту и счётчик подписчиков."""
+
+        old = Post.objects.create(author=self.author, text='Старый пост')
+        Post.objects.create(author=self.stranger, text='Чужой пост')
+        self.follow(self.author)
+        self.follow(self.author)
+        self.follow(self.reader)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).followers_count, 1,
+        )
+        self.assertEqual(list(self.feed()), [old])
+
+        new = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(list(self.feed()), [new, old])
+
+        self.client.post(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author},
+        ))
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(list(self.feed()), [])
+
+    @override_settings(FANOUT_MAX_FOLLOWERS=2)
+    def test_large_authors_merged_on_read(self):
+        """Посты крупных авторов подмешиваются при чтении."""
+
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=fan, author=self.author)
+        self.follow(self.author)
+        self.follow(self.stranger)
+        posts = [
+            Post.objects.create(
+                author=self.author if i % 2 else self.stranger,
+                text=f'Пост {i}',
+            )
+            for i in range(12)
+        ]
+        self.assertFalse(
+            TimelineEntry.objects.filter(author=self.author).exists(),
+        )
+        first = self.feed()
+        self.assertEqual(list(first), posts[::-1][:10])
+        second = self.feed(after=first.next_cursor)
+        self.assertEqual(list(second), posts[1::-1])
+        back = self.feed(before=second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        with self.assertNumQueries(5):
+            # Сессия, пользователь, крупные авторы, лента и их посты.
+            self.client.get(reverse('posts:follow_index'))
+
+    @override_settings(FANOUT_MAX_FOLLOWERS=2)
+    def test_author_below_threshold_is_backfilled(self):
+        """Посты автора, ставшего небольшим, не пропадают из ленты."""
+
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=fan, author=self.author)
+        self.follow(self.author)
+        post = Post.objects.create(author=self.author, text='Пост')
+        self.assertFalse(TimelineEntry.objects.exists())
+        Follow.objects.get(user=fan).delete()
+        self.assertEqual(list(self.feed()), [post])
+        self.assertTrue(
+            TimelineEntry.objects.filter(owner=self.reader).exists(),
+        )
+
+    def test_feed_pages_by_cursor(self):
+        """Лента подписок листается курсором."""
+
+        self.follow(self.author)
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {i}') for i in range(12)
+        )
+        fan_out_posts(Post.objects.values_list('pk', flat=True))
+        with self.assertNumQueries(4):
+            # Сессия, пользователь, крупные авторы и один диапазон ленты.
+            first = self.feed()
+        self.assertEqual(len(first), 10)
+        second = self.feed(after=first.next_cursor)
+        self.assertEqual(len(second), 2)
+        self.assertFalse(second.has_next())
+
+
+class FanOutQueueTests(TestCase):
+    def test_fan_out_is_queued_only_for_followed_authors(self):
+        """Пост автора без подписчиков не ставит задачу раскладки."""
+
+        author = User.objects.create_user(username='author')
+        Post.objects.create(author=author, text='Пост без подписчиков')
+        self.assertFalse(Task.objects.filter(name=fan_out.task_name).exists())
+
+        Follow.objects.create(
+            user=User.objects.create_user(username='reader'), author=author,
+        )
+        Post.objects.create(author=author, text='Пост для подписчика')
+        self.assertEqual(
+            Task.objects.filter(name=fan_out.task_name).count(), 1,
+        )
+
+
+class FollowViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def test_follow_requires_post_and_login(self):
+        """Подписка — только POST и только для вошедших."""
+
+        url = reverse('posts:profile_follow', kwargs={'username': 'auth'})
+        response = Client().post(url)
+        self.assertRedirects(
+            response, f'{reverse("users:login")}?next={url}',
+        )
+        client = Client()
+        client.force_login(User.objects.create_user(username='reader'))
+        self.assertEqual(client.get(url).status_code, 405)
+        self.assertFalse(Follow.objects.exists())
@@ -0,0 +1,104 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core.models import Task
+from core.queue import claim, execute
+from posts.images import image_variants
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+THUMBNAILS_TASK = 'posts.tasks.generate_thumbnails'
+
+
+def run_queue():
+    claimed = claim()
+    while claimed is not None:
+        execute(*claimed)
+        claimed = claim()
+
+
+def uploaded_image(name='small.png'):
+    content = BytesIO()
+    Image.new('RGB', (400, 200), 'teal').save(content, 'PNG')
+    return SimpleUploadedFile(name, content.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostImageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create_post(self):
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой',
+            'image': uploaded_image(),
+        })
+        return Post.objects.get()
+
+    def test_feed_shows_placeholder_until_worker(self):
+        """Пока воркер не сделал варианты, лента рисует заглушку."""
+
+        post = self.create_post()
+        self.assertTrue(post.image.name.startswith('posts/small'))
+        self.assertEqual(post.thumbnails, '')
+        self.assertTrue(Task.objects.filter(name=THUMBNAILS_TASK).exists())
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, 'img/placeholder.svg')
+        self.assertNotContains(response, 'srcset')
+
+        run_queue()
+        post.refresh_from_db()
+        feed = image_variants(post)['feed']
+        self.assertEqual(
+            [(size['width'], size['height']) for size in feed],
+            [(480, 170), (960, 339), (1920, 678)],
+        )
+        response = Client().get(reverse('posts:index'))
+        self.assertNotContains(response, 'img/placeholder.svg')
+        self.assertContains(response, f'{feed[0]["url"]} 480w')
+
+    def test_new_image_resets_variants(self):
+        """Новая картинка сбрасывает старые варианты и ставит задачу."""
+
+        post = self.create_post()
+        run_queue()
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails)
+
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            {'text': post.text, 'image': uploaded_image('other.png')},
+        )
+        post.refresh_from_db()
+        self.assertTrue(post.image.name.startswith('posts/other'))
+        self.assertEqual(post.thumbnails, '')
+        tasks = Task.objects.filter(name=THUMBNAILS_TASK)
+        self.assertEqual(tasks.count(), 1)
+
+        post = Post.objects.get(pk=post.pk)
+        post.text = 'Только текст'
+        post.save()
+        self.assertEqual(tasks.count(), 1)
@@ -1,7 +1,11 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
 
-from ..models import Group, Post
+from ..models import AuthorStats, Group, Post
 
 User = get_user_model()
 
@@ -57,3 +61,93 @@ class PostModelTest(TestCase):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_value
                 )
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_superuser(
+            username='auth', email='auth@example.com', password='pass',
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.group_1 = Group.objects.create(
+            title='Вторая группа',
+            slug='test-slug_1',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assertCounters(self, author, group, group_1):
+        self.user.stats.refresh_from_db()
+        self.group.refresh_from_db()
+        self.group_1.refresh_from_db()
+        self.assertEqual(
+            (
+                self.user.stats.posts_count,
+                self.group.posts_count,
+                self.group_1.posts_count,
+            ),
+            (author, group, group_1),
+        )
+
+    def test_counters_follow_post_changes(self):
+        """Счётчики меняются при создании, переносе и удалении поста."""
+
+        post = Post.objects.create(
+            author=self.user, text='Тестовый пост', group=self.group,
+        )
+        Post.objects.create(author=self.user, text='Без группы')
+        self.assertCounters(2, 1, 0)
+
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            data={'text': post.text, 'group': self.group_1.pk},
+        )
+        self.assertCounters(2, 0, 1)
+
+        self.authorized_client.post(
+            reverse('admin:posts_post_changelist'),
+            data={
+                'form-TOTAL_FORMS': 1,
+                'form-INITIAL_FORMS': 1,
+                'form-0-id': post.pk,
+                'form-0-group': self.group.pk,
+                '_save': 'Сохранить',
+            },
+        )
+        self.assertCounters(2, 1, 0)
+
+        Post.objects.get(pk=post.pk).delete()
+        self.assertCounters(1, 0, 0)
+
+    def test_deleted_author_leaves_no_stats(self):
+        """Удаление автора с постами не заводит заново его счётчики."""
+
+        author = User.objects.create_user(username='leaving')
+        author_id = author.pk
+        Post.objects.create(author=author, text='Тестовый пост')
+        AuthorStats.objects.filter(author_id=author_id).delete()
+        author.delete()
+        self.assertFalse(
+            AuthorStats.objects.filter(author_id=author_id).exists(),
+        )
+
+    def test_rebuild_command_fixes_drift(self):
+        """Команда rebuild_post_counters чинит разошедшиеся счётчики."""
+
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пост_{i}', group=self.group)
+            for i in range(3)
+        )
+        out = StringIO()
+        call_command('rebuild_post_counters', stdout=out)
+        self.assertIn('авторов — 1, групп — 1', out.getvalue())
+        self.assertCounters(3, 3, 0)
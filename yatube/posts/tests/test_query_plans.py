@@ -0,0 +1,88 @@
+import re
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, Post
+from posts.utils import encode_cursor
+
+User = get_user_model()
+
+# SQLite до 3.36 пишет в плане SCAN TABLE, новее — просто SCAN.
+FULL_SCAN = re.compile(r'SCAN (TABLE )?posts_post\b')
+
+
+class FeedQueryPlanTests(TestCase):
+    """Запросы лент к posts_post идут по индексу.
+
+    Каждый SELECT, который выполняет представление, прогоняется через
+    EXPLAIN QUERY PLAN: полный скан таблицы или сортировка во временном
+    B-дереве валят тест.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assert_plans_use_index(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(url, params)
+        self.assertEqual(response.status_code, 200)
+        selects = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'posts_post' in query['sql']
+        ]
+        self.assertTrue(selects)
+        for sql in selects:
+            plan = self.explain(sql)
+            for step in plan:
+                with self.subTest(url=url, sql=sql):
+                    self.assertNotIn('TEMP B-TREE', step, plan)
+                    if FULL_SCAN.match(step):
+                        self.assertIn('INDEX', step, plan)
+
+    def test_offset_feeds_use_index(self):
+        """Ленты с ?page=N и страница поста читаются по индексу."""
+
+        for url in self.urls:
+            for page in (None, '1000'):
+                with self.subTest(url=url, page=page):
+                    self.assert_plans_use_index(url, page and {'page': page})
+
+    @override_settings(KEYSET_PAGINATION=True)
+    def test_keyset_feeds_use_index(self):
+        """Ленты в режиме курсора ищут диапазон в индексе."""
+
+        cursor = encode_cursor(timezone.now() + timedelta(days=1), 1)
+        for url in self.urls[:3]:
+            for direction in ('after', 'before'):
+                with self.subTest(url=url, direction=direction):
+                    self.assert_plans_use_index(url, {direction: cursor})
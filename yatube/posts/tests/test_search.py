@@ -0,0 +1,106 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from posts.search import match_query, search_posts
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_superuser(
+            username='auth', email='auth@example.com', password='pass',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Котики любят солнце',
+        )
+        cls.post_1 = Post.objects.create(
+            author=cls.user,
+            text='Котики, котики и ещё раз котики',
+        )
+        Post.objects.create(author=cls.user, text='Про собак')
+
+    def found(self, query):
+        results = search_posts(query)
+        return [post.pk for post in results[:results.count()]]
+
+    def test_results_are_ranked(self):
+        """Поиск находит посты по слову, релевантные выше."""
+
+        self.assertEqual(self.found('котики'), [self.post_1.pk, self.post.pk])
+        self.assertEqual(self.found('КОТИКИ солнце'), [self.post.pk])
+        self.assertEqual(self.found('кошки'), [])
+
+    @override_settings(SEARCH_RANK_LIMIT=1)
+    def test_frequent_words_skip_ranking(self):
+        """Слишком частое слово выдаётся новыми постами вперёд."""
+
+        Post.objects.create(author=self.user, text='Котики спят')
+        self.assertEqual(
+            self.found('котики')[1:], [self.post_1.pk, self.post.pk],
+        )
+
+    def test_index_follows_table(self):
+        """Индекс обновляется при правке, удалении и bulk_create."""
+
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Собаки любят солнце'
+        post.save()
+        self.assertEqual(self.found('котики'), [self.post_1.pk])
+        self.assertIn(post.pk, self.found('собаки'))
+
+        Post.objects.get(pk=self.post_1.pk).delete()
+        self.assertEqual(self.found('котики'), [])
+
+        Post.objects.bulk_create([Post(author=self.user, text='Котики')])
+        self.assertEqual(len(self.found('котики')), 1)
+
+    def test_query_syntax_is_escaped(self):
+        """Операторы FTS5 в запросе не ломают поиск."""
+
+        self.assertEqual(match_query('котики NOT "собаки*'),
+                         '"котики" "NOT" "собаки"')
+        for query in ('"', 'NOT', '*', 'AND OR', '   '):
+            with self.subTest(query=query):
+                self.assertEqual(self.found(query), [])
+
+    def test_search_page(self):
+        """Страница поиска выводит найденное и хранит запрос в ссылках."""
+
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Котики_{i} котики')
+            for i in range(12)
+        )
+        response = Client().get(reverse('posts:search'), {'q': 'котики'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].paginator.count, 14)
+        self.assertContains(response, 'href="?q=%D0%BA%D0%BE%D1%82%D0%B8')
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке находит посты через тот же индекс."""
+
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'солнце'},
+        )
+        self.assertEqual(
+            [post.pk for post in response.context['cl'].result_list],
+            [self.post.pk],
+        )
+
+    def test_admin_search_without_words(self):
+        """Запрос без слов в админке даёт пустой список, а не ошибку."""
+
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': '!!!'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['cl'].result_list), [])
@@ -0,0 +1,209 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.counters import get_feed_count, rebuild_counters, set_feed_count
+from posts.models import Post
+from posts.utils import (FEED_INDEX, KeysetPaginator, StoredCountPaginator,
+                         author_feed, decode_cursor, encode_cursor,
+                         page_window)
+
+User = get_user_model()
+
+
+class KeysetPaginatorTests(TestCase):
+    PER_PAGE = 10
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Тестовый пост_{i}')
+            for i in range(25)
+        )
+        # Часть постов с одинаковой датой: порядок держится на id.
+        now = timezone.now()
+        posts = Post.objects.order_by('pk')
+        Post.objects.filter(pk__in=posts[:12]).update(pub_date=now)
+        for shift, post in enumerate(posts[12:], start=1):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(minutes=shift),
+            )
+        cls.expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True,
+            )
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def paginator(self):
+        return KeysetPaginator(Post.objects.all(), self.PER_PAGE)
+
+    def test_cursor_round_trip(self):
+        """Курсор распаковывается в исходный ключ."""
+
+        now = timezone.now()
+        self.assertEqual(decode_cursor(encode_cursor(now, 42)), (now, 42))
+        for token in ('', 'мусор', 'bm90LWEtY3Vyc29y', '!!!'):
+            with self.subTest(token=token):
+                self.assertIsNone(decode_cursor(token))
+
+    def test_walk_forward_and_back(self):
+        """Проход по курсорам вперёд и назад повторяет порядок ленты."""
+
+        paginator = self.paginator()
+        pages = [paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(after=pages[-1].next_cursor))
+        walked = [post.pk for page in pages for post in page]
+        self.assertEqual(walked, self.expected)
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertFalse(pages[0].has_previous())
+
+        page = pages[-1]
+        back = [post.pk for post in page]
+        while page.has_previous():
+            page = paginator.get_page(before=page.previous_cursor)
+            back = [post.pk for post in page] + back
+        self.assertEqual(back, self.expected)
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный курсор открывает первую страницу."""
+
+        page = self.paginator().get_page(after='мусор')
+        self.assertEqual([post.pk for post in page], self.expected[:10])
+        self.assertFalse(page.has_previous())
+
+    def test_page_has_constant_query_count(self):
+        """Глубокая страница стоит один запрос, без COUNT(*)."""
+
+        paginator = self.paginator()
+        cursor = encode_cursor(timezone.now() - timedelta(days=1), 1)
+        with self.assertNumQueries(1):
+            page = paginator.get_page(after=cursor)
+            list(page)
+            self.assertFalse(page.has_next())
+
+    @override_settings(KEYSET_PAGINATION=True)
+    def test_feed_renders_cursor_links(self):
+        """Лента в режиме курсора ссылается на ?after= и ?before=."""
+
+        client = Client()
+        response = client.get(reverse('posts:index'))
+        next_cursor = response.context['page_obj'].next_cursor
+        self.assertContains(response, f'?after={next_cursor}')
+        self.assertNotContains(response, '?page=')
+
+        response = client.get(reverse('posts:index'), {'after': next_cursor})
+        page = response.context['page_obj']
+        self.assertEqual([post.pk for post in page], self.expected[10:20])
+        self.assertContains(response, f'?before={page.previous_cursor}')
+
+
+class StoredCountPaginatorTests(TestCase):
+    PER_PAGE = 10
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Тестовый пост_{i}')
+            for i in range(25)
+        )
+        rebuild_counters()
+
+    def setUp(self):
+        cache.clear()
+
+    def paginator(self, feed=FEED_INDEX):
+        return StoredCountPaginator(Post.objects.all(), self.PER_PAGE, feed)
+
+    def test_count_comes_from_counter(self):
+        """Страница ленты берёт число постов из счётчика без COUNT(*)."""
+
+        with CaptureQueriesContext(connection) as queries:
+            page = self.paginator().get_page(1)
+        self.assertEqual(page.paginator.num_pages, 3)
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries),
+        )
+        with self.assertNumQueries(2):
+            # Последняя страница сверяется со счётчиком без пробы.
+            self.paginator().get_page(3)
+
+    def test_signals_adjust_counters(self):
+        """Создание и удаление поста сдвигают счётчики лент."""
+
+        post = Post.objects.create(author=self.user, text='Новый пост')
+        self.assertEqual(get_feed_count(FEED_INDEX), 26)
+        self.assertEqual(get_feed_count(author_feed(self.user.pk)), 26)
+        post.delete()
+        self.assertEqual(get_feed_count(FEED_INDEX), 25)
+
+    def test_stale_count_never_renders_missing_page(self):
+        """Разошедшийся счётчик не рисует несуществующих страниц."""
+
+        for stale in (100, 26, 21, 5):
+            with self.subTest(stale=stale):
+                set_feed_count(FEED_INDEX, stale)
+                page = self.paginator().get_page(1)
+                self.assertEqual(page.paginator.num_pages, 3)
+                self.assertEqual(max(filter(None, page.page_window)), 3)
+                self.assertEqual(get_feed_count(FEED_INDEX), 25)
+
+        set_feed_count(FEED_INDEX, 100)
+        response = Client().get(reverse('posts:index'))
+        self.assertNotContains(response, '?page=10')
+        self.assertNotContains(response, '?page=4')
+
+        set_feed_count(FEED_INDEX, 100)
+        page = self.paginator().get_page(7)
+        self.assertEqual((page.number, len(page)), (3, 5))
+
+        set_feed_count(FEED_INDEX, 5)
+        page = self.paginator().get_page(3)
+        self.assertEqual((page.number, len(page)), (3, 5))
+
+
+class PageWindowTests(TestCase):
+    def test_page_window(self):
+        """Окно страниц: края, соседи текущей и пропуски."""
+
+        cases = {
+            (1, 1): [1],
+            (1, 5): [1, 2, 3, 4, 5],
+            (1, 200): [1, 2, 3, None, 200],
+            (5, 200): [1, 2, 3, 4, 5, 6, 7, None, 200],
+            (100, 200): [1, None, 98, 99, 100, 101, 102, None, 200],
+            (200, 200): [1, None, 198, 199, 200],
+        }
+        for (number, num_pages), expected in cases.items():
+            with self.subTest(number=number, num_pages=num_pages):
+                self.assertEqual(page_window(number, num_pages), expected)
+
+    def test_feed_renders_only_window(self):
+        """Лента с сотнями страниц рисует только окно ссылок."""
+
+        user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(author=user, text=f'Тестовый пост_{i}') for i in range(300)
+        )
+        cache.clear()
+        response = Client().get(reverse('posts:index'), {'page': 15})
+        self.assertEqual(
+            response.context['page_obj'].page_window,
+            [1, None, 13, 14, 15, 16, 17, None, 30],
+        )
+        self.assertContains(response, 'class="page-item', count=13)
+        self.assertContains(response, '?page=30"', count=2)
+        self.assertNotContains(response, '?page=20"')
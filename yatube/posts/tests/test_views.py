@@ -1,14 +1,27 @@
 from django import forms
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
 from posts.models import Group, Post
 
+from .utils import query_budget
+
 User = get_user_model()
 
 
 class PostPagesTests(TestCase):
+    # Бюджет запросов страниц для гостя, не зависящий от числа постов,
+    # вместе с запросом состояния для ETag и Last-Modified и пересчётом
+    # разошедшегося счётчика ленты
+    QUERY_BUDGETS = {
+        'posts:index': 5,
+        'posts:group_list': 5,
+        'posts:profile': 4,
+        'posts:post_detail': 2,
+    }
+
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -176,3 +189,81 @@ class PostPagesTests(TestCase):
                         response.context['page_obj']),
                         number_post
                     )
+
+    def test_pages_query_budget(self):
+        """Число запросов лент не растёт с количеством постов."""
+
+        pages = (
+            self.index_page,
+            self.group_page,
+            self.profile_page,
+            self.detail_page,
+        )
+        guest_client = Client()
+        for size in (0, 15):
+            Post.objects.bulk_create(
+                Post(
+                    author=User.objects.create_user(username=f'user_{i}'),
+                    text=f'Тестовый пост_{i}',
+                    group=self.group,
+                )
+                for i in range(size)
+            )
+            # bulk_create не шлёт сигналов: счётчики лент расходятся,
+            # и мерится путь с пересчётом. Кэш страниц сбрасывается.
+            cache.clear()
+            for url, args, _ in pages:
+                with self.subTest(url=url, size=size):
+                    with query_budget(self.QUERY_BUDGETS[url]):
+                        response = guest_client.get(reverse(url, kwargs=args))
+                    self.assertEqual(response.status_code, 200)
+
+
+class PostExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(author=cls.user, text='Без группы')
+        Post.objects.create(author=cls.user, text='В группе', group=cls.group)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_export_streams_posts(self):
+        """Выгрузка автора и группы отдаётся потоком в CSV и NDJSON."""
+
+        profile_url = reverse(
+            'posts:profile_export', kwargs={'username': self.user.username},
+        )
+        response = self.authorized_client.get(profile_url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,text,pub_date,author,group')
+        self.assertEqual(len(lines), 3)
+
+        response = self.authorized_client.get(
+            reverse('posts:group_export', kwargs={'slug': self.group.slug}),
+            {'format': 'ndjson'},
+        )
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(len(content.splitlines()), 1)
+        self.assertIn('"text":"В группе"', content)
+
+        response = self.authorized_client.get(profile_url, {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_requires_login(self):
+        """Гость перенаправляется на страницу входа."""
+
+        response = Client().get(
+            reverse('posts:group_export', kwargs={'slug': self.group.slug}),
+        )
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,40 @@
+from contextlib import ContextDecorator
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class query_budget(ContextDecorator):
+    """Падает, если блок кода выполнил больше запросов, чем разрешено.
+
+    Работает и как контекстный менеджер, и как декоратор теста::
+
+        with query_budget(3):
+            client.get(url)
+    """
+
+    def __init__(self, max_queries, using=DEFAULT_DB_ALIAS):
+        self.max_queries = max_queries
+        self.using = using
+
+    def __enter__(self):
+        self.context = CaptureQueriesContext(connections[self.using])
+        self.context.__enter__()
+        return self.context
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+        executed = len(self.context)
+        if executed > self.max_queries:
+            queries = '\n'.join(
+                f'{number}. {query["sql"]}' for number, query in enumerate(
+                    self.context.captured_queries, start=1
+                )
+            )
+            raise AssertionError(
+                f'{executed} запросов при бюджете {self.max_queries}:\n'
+                f'{queries}'
+            )
+        return False
@@ -0,0 +1,154 @@
+from itertools import groupby
+
+from django.conf import settings
+
+from .models import Follow, Post, TimelineEntry
+from .utils import KeysetPaginator
+
+
+def _create_entries(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=500, ignore_conflicts=True,
+    )
+
+
+def fan_out_posts(post_ids):
+    """Раскладывает посты по лентам подписчиков их авторов.
+
+    Посты авторов с FANOUT_MAX_FOLLOWERS подписчиков и больше
+    не раскладываются: лента подмешивает их при чтении.
+    """
+    posts = (
+        Post.objects.filter(
+            pk__in=post_ids,
+            author__stats__followers_count__gt=0,
+            author__stats__followers_count__lt=settings.FANOUT_MAX_FOLLOWERS,
+        )
+        .order_by('author_id')
+        .values_list('author_id', 'pk', 'pub_date')
+    )
+    for author_id, rows in groupby(posts, key=lambda row: row[0]):
+        rows = list(rows)
+        followers = Follow.objects.filter(
+            author_id=author_id,
+        ).values_list('user_id', flat=True)
+        _create_entries([
+            TimelineEntry(
+                owner_id=owner_id,
+                author_id=author_id,
+                post_id=post_id,
+                pub_date=pub_date,
+            )
+            for owner_id in followers
+            for _, post_id, pub_date in rows
+        ])
+
+
+def backfill_timeline(user_id, author_id):
+    """Кладёт в ленту нового подписчика последние посты автора."""
+    follow = Follow.objects.filter(
+        user_id=user_id,
+        author_id=author_id,
+        author__stats__followers_count__lt=settings.FANOUT_MAX_FOLLOWERS,
+    )
+    if not follow.exists():
+        # Уже отписался или автор читается при чтении ленты.
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date',
+    )[:settings.TIMELINE_BACKFILL]
+    _create_entries([
+        TimelineEntry(
+            owner_id=user_id,
+            author_id=author_id,
+            post_id=post_id,
+            pub_date=pub_date,
+        )
+        for post_id, pub_date in posts
+    ])
+
+
+def backfill_follower_timelines(author_id):
+    """Кладёт последние посты автора в ленты всех его подписчиков.
+
+    Нужна, когда автор опустился ниже FANOUT_MAX_FOLLOWERS: его посты
+    больше не подмешиваются при чтении, а по лентам разложены не были.
+    """
+    if not Follow.objects.filter(
+        author_id=author_id,
+        author__stats__followers_count__lt=settings.FANOUT_MAX_FOLLOWERS,
+    ).exists():
+        # Автор снова крупный или подписчиков не осталось.
+        return
+    posts = list(Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date',
+    )[:settings.TIMELINE_BACKFILL])
+    followers = Follow.objects.filter(
+        author_id=author_id,
+    ).values_list('user_id', flat=True)
+    _create_entries([
+        TimelineEntry(
+            owner_id=owner_id,
+            author_id=author_id,
+            post_id=post_id,
+            pub_date=pub_date,
+        )
+        for owner_id in followers
+        for post_id, pub_date in posts
+    ])
+
+
+def clear_timeline(user_id, author_id):
+    """Убирает посты автора из ленты отписавшегося читателя."""
+    TimelineEntry.objects.filter(
+        owner_id=user_id, author_id=author_id,
+    ).delete()
+
+
+def pulled_authors(user):
+    """Авторы из подписок, чьи посты не раскладываются по лентам."""
+    return list(Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gte=settings.FANOUT_MAX_FOLLOWERS,
+    ).values_list('author_id', flat=True))
+
+
+class FollowFeedPaginator(KeysetPaginator):
+    """Лента подписок: готовые записи плюс посты крупных авторов.
+
+    Разложенная часть — один диапазон индекса ленты читателя.
+    Посты авторов из pulled добираются вторым запросом с тем же
+    курсором и сливаются с ней по (pub_date, id).
+    """
+
+    def __init__(self, user, per_page, pulled=()):
+        super().__init__(
+            Post.objects.filter(author_id__in=pulled).select_related(
+                'author', 'group',
+            ),
+            per_page,
+        )
+        self.pulled = bool(pulled)
+        self.entries = KeysetPaginator(
+            TimelineEntry.objects.filter(owner=user).select_related(
+                'post__author', 'post__group',
+            ),
+            per_page,
+            ('pub_date', 'post_id'),
+        )
+
+    def _fetch(self, cursor, forward):
+        entries, has_more = self.entries._fetch(cursor, forward)
+        posts = [entry.post for entry in entries]
+        if not self.pulled:
+            return posts, has_more
+        pulled, pulled_more = super()._fetch(cursor, forward)
+        # Пост мог попасть и в ленту, пока автор был небольшим.
+        merged = {post.pk: post for post in posts + pulled}.values()
+        posts = sorted(
+            merged, key=lambda post: (post.pub_date, post.pk), reverse=True,
+        )
+        has_more = has_more or pulled_more or len(posts) > self.per_page
+        if forward:
+            return posts[:self.per_page], has_more
+        return posts[-self.per_page:], has_more
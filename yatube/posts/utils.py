@@ -1,7 +1,254 @@
-from django.core.paginator import Paginator
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 
+from django.conf import settings
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
 
-def paginator_method(request, posts, number_per_page):
-    paginator = Paginator(posts, number_per_page)
+from .counters import (FEED_INDEX, author_feed, get_feed_count,  # noqa
+                       group_feed, set_feed_count)
+
+
+def encode_cursor(pub_date, pk):
+    """Упаковывает ключ (pub_date, id) в непрозрачный токен для URL."""
+    raw = f'{pub_date.isoformat()}|{pk}'.encode()
+    return urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен курсора, для испорченного токена вернёт None."""
+    try:
+        raw = urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        pub_date, pk = raw.rsplit('|', 1)
+        pub_date, pk = parse_datetime(pub_date), int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+class KeysetPage(Page):
+    """Страница ленты, которая знает соседей без номера и COUNT(*)."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self.object_list)} objects>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def _cursor(self, obj):
+        date_field, pk_field = self.paginator.fields
+        if isinstance(obj, dict):
+            # Страница из queryset.values(): ключ берётся из словаря.
+            return encode_cursor(obj[date_field], obj[pk_field])
+        return encode_cursor(getattr(obj, date_field), getattr(obj, pk_field))
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self._cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return self._cursor(self.object_list[0])
+
+
+class KeysetPaginator(Paginator):
+    """Постраничный вывод по ключу (pub_date, id) вместо OFFSET/LIMIT.
+
+    Каждая страница — один запрос по индексу с LIMIT per_page + 1,
+    поэтому стоимость не зависит от глубины страницы.
+    """
+
+    is_keyset = True
+
+    def __init__(self, object_list, per_page, fields=('pub_date', 'pk')):
+        self.fields = fields
+        date_field, pk_field = fields
+        object_list = object_list.order_by(f'-{date_field}', f'-{pk_field}')
+        super().__init__(object_list, per_page)
+
+    def _fetch(self, cursor, forward):
+        date_field, pk_field = self.fields
+        posts = self.object_list
+        if cursor is not None:
+            pub_date, pk = cursor
+            lookup = 'lt' if forward else 'gt'
+            # Условие на pub_date с границей позволяет SQLite искать
+            # по индексу, а не фильтровать ленту с начала.
+            posts = posts.filter(
+                Q(**{f'{date_field}__{lookup}e': pub_date}),
+                Q(**{f'{date_field}__{lookup}': pub_date})
+                | Q(**{f'{pk_field}__{lookup}': pk}),
+            )
+        if not forward:
+            posts = posts.reverse()
+        rows = list(posts[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+        return rows, has_more
+
+    def get_page(self, after=None, before=None):
+        after = decode_cursor(after) if after else None
+        before = decode_cursor(before) if before else None
+        if before is not None:
+            rows, has_previous = self._fetch(before, forward=False)
+            if not has_previous:
+                # Дошли до начала ленты: показываем полную первую страницу.
+                return self.get_page()
+            return KeysetPage(rows, self, True, True)
+        rows, has_next = self._fetch(after, forward=True)
+        return KeysetPage(rows, self, has_next, after is not None)
+
+
+def page_window(number, num_pages, on_each_side=2, on_ends=1):
+    """Номера страниц для ссылок: края и окрестность текущей.
+
+    Пропуск между номерами обозначается None, шаблон рисует
+    на его месте многоточие.
+    """
+    numbers = {
+        *range(1, min(on_ends, num_pages) + 1),
+        *range(max(num_pages - on_ends + 1, 1), num_pages + 1),
+        *range(
+            max(number - on_each_side, 1),
+            min(number + on_each_side, num_pages) + 1,
+        ),
+    }
+    window = []
+    previous = 0
+    for current in sorted(numbers):
+        if current - previous == 2:
+            # Многоточие вместо одной страницы ничего не экономит.
+            window.append(previous + 1)
+        elif current - previous > 2:
+            window.append(None)
+        window.append(current)
+        previous = current
+    return window
+
+
+class WindowedPage(Page):
+    on_each_side = 2
+    on_ends = 1
+
+    @cached_property
+    def page_window(self):
+        return page_window(
+            self.number,
+            self.paginator.num_pages,
+            self.on_each_side,
+            self.on_ends,
+        )
+
+
+class WindowedPaginator(Paginator):
+    """Paginator, страницы которого отдают окно номеров page_window."""
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+
+class StoredCountPaginator(WindowedPaginator):
+    """Paginator, который берёт число постов ленты из её счётчика.
+
+    Счётчики правят сигналы Post одним UPDATE с F(), без COUNT(*).
+    Прежде чем номера страниц попадут в ссылки, счётчик сверяется
+    со страницей: короткая страница должна кончаться ровно на нём,
+    а за полной — найтись последний пост ленты на его месте.
+    Разошедшийся счётчик пересчитывается, так что несуществующая
+    страница не отрисовывается.
+    """
+
+    def __init__(self, object_list, per_page, feed, count=None):
+        super().__init__(object_list, per_page)
+        self.feed = feed
+        self.count_is_fresh = False
+        if count is not None:
+            # Счётчик уже прочитан вместе с группой или автором.
+            self.__dict__['count'] = count
+
+    @cached_property
+    def count(self):
+        count = get_feed_count(self.feed)
+        if count is None:
+            count = self.refresh_count()
+        return count
+
+    def refresh_count(self):
+        count = self.object_list.count()
+        set_feed_count(self.feed, count)
+        self.__dict__['count'] = count
+        self.__dict__.pop('num_pages', None)
+        self.count_is_fresh = True
+        return count
+
+    def count_matches(self, bottom, rows):
+        """Сходится ли счётчик со страницей, взятой с лишней строкой."""
+        if len(rows) <= self.per_page:
+            return self.count == bottom + len(rows)
+        if self.count <= bottom + self.per_page:
+            return False
+        # Последний пост ленты стоит ровно на месте счётчика. Только
+        # id по индексу ленты: без чтения самих постов и их связей.
+        tail = self.object_list.values_list('pk', flat=True)[
+            self.count - 1:self.count + 1
+        ]
+        return len(tail) == 1
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if self.count_is_fresh:
+                raise
+            # Номер мог выйти за конец из-за разошедшегося счётчика.
+            self.refresh_count()
+            return super().validate_number(number)
+
+    def get_page(self, number):
+        try:
+            return super().get_page(number)
+        except EmptyPage:
+            # Пересчёт показал, что страница уже за концом ленты.
+            return self.page(self.num_pages)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        # Лишняя строка показывает, есть ли посты за концом страницы.
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not self.count_is_fresh and not self.count_matches(bottom, rows):
+            self.refresh_count()
+            self.validate_number(number)
+        return self._get_page(rows[:self.per_page], number, self)
+
+
+def paginator_method(request, posts, number_per_page, feed=None, count=None):
+    if settings.KEYSET_PAGINATION:
+        paginator = KeysetPaginator(posts, number_per_page)
+        return paginator.get_page(
+            request.GET.get('after'),
+            request.GET.get('before'),
+        )
+    if feed is not None:
+        paginator = StoredCountPaginator(posts, number_per_page, feed, count)
+    else:
+        paginator = WindowedPaginator(posts, number_per_page)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
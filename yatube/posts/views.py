@@ -1,19 +1,66 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseBadRequest
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.http import urlencode
+from django.views.decorators.http import require_POST
 
 from yatube.settings import NUMBER_OF_POSTS
 
+from .cache import cache_anonymous_page
+from .conditional import conditional_page, feed_state
+from .counters import get_author_posts_count
+from .export import EXPORT_FORMATS, export_response
 from .forms import PostForm
-from .models import Group, Post
-from .utils import paginator_method
+from .models import AuthorStats, FeedCounter, Follow, Group, Post
+from .search import search_posts
+from .timeline import FollowFeedPaginator, pulled_authors
+from .utils import (FEED_INDEX, WindowedPaginator, author_feed, group_feed,
+                    paginator_method)
 
 User = get_user_model()
 
 
+def _index_state(request):
+    return feed_state(
+        Post.objects.all(), FeedCounter.objects.filter(feed=FEED_INDEX),
+    )
+
+
+def _group_state(request, slug):
+    return feed_state(
+        Post.objects.filter(group__slug=slug),
+        Group.objects.filter(slug=slug),
+    )
+
+
+def _profile_state(request, username):
+    # Кнопка подписки тоже часть страницы.
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author__username=username,
+    ).exists()
+    posts = Post.objects.filter(author__username=username)
+    stats = AuthorStats.objects.filter(author__username=username)
+    return feed_state(posts, stats, following)
+
+
+def _post_state(request, post_id):
+    # На странице поста видно и число постов автора.
+    state = Post.objects.filter(pk=post_id).values_list(
+        'edited', 'author__stats__posts_count',
+    ).first()
+    if state is None:
+        return None
+    return state[0], state
+
+
+@cache_anonymous_page
+@conditional_page(_index_state)
 def index(request):
-    post_list = Post.objects.all()
-    page_obj = paginator_method(request, post_list, NUMBER_OF_POSTS)
+    post_list = Post.objects.select_related('author', 'group')
+    page_obj = paginator_method(
+        request, post_list, NUMBER_OF_POSTS, FEED_INDEX,
+    )
     template = 'posts/index.html'
     context = {
         'page_obj': page_obj,
@@ -21,11 +68,16 @@ def index(request):
     return render(request, template, context)
 
 
+@cache_anonymous_page
+@conditional_page(_group_state)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     template = 'posts/group_list.html'
-    posts = group.posts.all()
-    page_obj = paginator_method(request, posts, NUMBER_OF_POSTS)
+    posts = group.posts.select_related('author', 'group')
+    page_obj = paginator_method(
+        request, posts, NUMBER_OF_POSTS, group_feed(group.pk),
+        group.posts_count,
+    )
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -33,23 +85,39 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@cache_anonymous_page
+@conditional_page(_profile_state)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    page_obj = paginator_method(request, posts, NUMBER_OF_POSTS)
-    posts_count = posts.count()
+    author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username,
+    )
+    posts = author.posts.select_related('author', 'group')
+    posts_count = get_author_posts_count(author)
+    page_obj = paginator_method(
+        request, posts, NUMBER_OF_POSTS, author_feed(author.pk), posts_count,
+    )
+    following = request.user.is_authenticated and (
+        Follow.objects.filter(user=request.user, author=author).exists()
+    )
     context = {
         'author': author,
         'page_obj': page_obj,
         'posts_count': posts_count,
+        'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@cache_anonymous_page
+@conditional_page(_post_state)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'),
+        pk=post_id,
+    )
     author = post.author
-    post_count = author.posts.all().count()
+    post_count = get_author_posts_count(author)
     context = {
         'post': post,                  # Имена 'requrst_name' и 'post_name'
         'post_count': post_count,      # для ссылки на редоктирование поста
@@ -59,9 +127,42 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def _export(request, posts, filename):
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(
+            f'Формат выгрузки: {", ".join(EXPORT_FORMATS)}'
+        )
+    return export_response(posts, filename, export_format)
+
+
+@login_required
+def group_export(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return _export(request, group.posts.all(), f'group-{group.slug}')
+
+
+@login_required
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    return _export(request, author.posts.all(), f'profile-{author.username}')
+
+
+def search(request):
+    query = request.GET.get('q', '')
+    paginator = WindowedPaginator(search_posts(query), NUMBER_OF_POSTS)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -74,13 +175,49 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.select_related('author'), pk=post_id)
     if request.user.username != post.author.username:
         return redirect('posts:post_detail', post_id=post_id)
-    form = PostForm(request.POST, instance=post)
+    form = PostForm(
+        request.POST, files=request.FILES or None, instance=post,
+    )
     if form.is_valid():
         form.save()
         return redirect('posts:post_detail', post_id=post_id)
     form = PostForm(instance=post)
     context = {'form': form, 'is_edit': True}
     return render(request, 'posts/create_post.html', context)
+
+
+@login_required
+def follow_index(request):
+    paginator = FollowFeedPaginator(
+        request.user, NUMBER_OF_POSTS, pulled_authors(request.user),
+    )
+    page_obj = paginator.get_page(
+        request.GET.get('after'),
+        request.GET.get('before'),
+    )
+    context = {'page_obj': page_obj}
+    return render(request, 'posts/follow.html', context)
+
+
+@login_required
+@require_POST
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+@require_POST
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    follow = Follow.objects.select_related('author').filter(
+        user=request.user, author=author,
+    ).first()
+    if follow is not None:
+        follow.delete()
+    return redirect('posts:profile', username=username)
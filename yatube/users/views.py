@@ -1,6 +1,9 @@
-from django.urls import reverse_lazy
+from django.template.loader import render_to_string
+from django.urls import reverse, reverse_lazy
 from django.views.generic import CreateView
 
+from core.tasks import send_email
+
 from .forms import CreationForm
 
 
@@ -8,3 +11,20 @@ class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
     template_name = 'users/signup.html'
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        user = self.object
+        if user.email:
+            # Приветствие уходит через очередь: ответ не ждёт почту.
+            send_email.delay(
+                subject='Добро пожаловать в Yatube',
+                body=render_to_string('users/signup_email.txt', {
+                    'user': user,
+                    'login_url': self.request.build_absolute_uri(
+                        reverse('users:login'),
+                    ),
+                }),
+                to=[user.email],
+            )
+        return response
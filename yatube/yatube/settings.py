@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -34,9 +35,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -44,6 +49,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -51,7 +57,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.timing.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -76,7 +82,34 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        # Соединение живёт между запросами, а не открывается на каждый
+        'CONN_MAX_AGE': 60,
+    },
+    # Копия основной базы для чтения; её обновляет manage.py sync_replica
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+# Псевдонимы баз, с которых читают ленты; пусто — всё с основной
+DATABASE_REPLICAS = [
+    alias
+    for alias in os.environ.get('DATABASE_REPLICAS', '').split(',')
+    if alias
+]
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# PRAGMA для каждого нового соединения с SQLite: WAL не даёт читателям
+# блокировать писателя, busy_timeout ждёт блокировку вместо ошибки
+# «database is locked».
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
 }
 
 
@@ -119,9 +152,144 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)  # Static files (CSS, Jav
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'slow_queries.log')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'encoding': 'utf-8',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        # Строка JSON с замерами на каждый запрос; при разработке молчит.
+        'core.timing': {
+            'handlers': ['console'],
+            'level': 'WARNING' if DEBUG else 'INFO',
+            'propagate': False,
+        },
+        'core.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
 NUMBER_OF_POSTS = 10
 CHARACTERS = 15
+# Постраничный вывод лент по курсору (?after=/?before=) вместо ?page=
+KEYSET_PAGINATION = False
+# Кэш общий для всех процессов: версию кэша страниц сдвигает процесс,
+# записавший пост, будь то веб-воркер, run_worker или команда. Кэш
+# в памяти процесса (LocMemCache) запрещён проверкой core.E001.
+# На нескольких машинах — memcached через CACHE_BACKEND и CACHE_LOCATION
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache',
+        ),
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'yatube-cache')
+        ),
+    },
+}
+# Файловый кэш по умолчанию после 300 записей выбрасывает треть файлов,
+# а страниц лент у анонимов куда больше. Держим до CACHE_MAX_ENTRIES
+# и чистим по десятой части. Memcached передаёт OPTIONS клиенту как есть
+if CACHES['default']['BACKEND'].endswith('FileBasedCache'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 100000)),
+        'CULL_FREQUENCY': 10,
+    }
+# Тесты получают свой каталог кэша, см. core.testing
+TEST_RUNNER = 'core.testing.TestRunner'
+# Кэш страниц лент и постов для анонимных пользователей
+PAGE_CACHE_ENABLED = True
+# Сколько страница считается свежей, секунд
+PAGE_CACHE_TIMEOUT = 60
+# Сколько после этого можно отдавать устаревшую копию, пока идёт пересборка
+PAGE_CACHE_STALE_TIMEOUT = 10 * 60
+# Блокировка пересборки и ожидание её без устаревшей копии
+PAGE_CACHE_LOCK_TIMEOUT = 10
+PAGE_CACHE_POLL_INTERVAL = 0.05
+# Больше совпадений поиск не ранжирует по bm25, а выдаёт новые посты первыми
+SEARCH_RANK_LIMIT = 50_000
+# Заголовок Server-Timing и лог core.timing с замерами каждого запроса
+SERVER_TIMING_ENABLED = True
+# Запросы к базе дольше порога пишутся в slow_queries.log; None — не писать
+SLOW_QUERY_THRESHOLD_MS = 100
+# Метрики Prometheus на /metrics: каждый процесс пишет свой файл в METRICS_DIR,
+# эндпоинт складывает их. Файлы завершившихся процессов удаляет новый процесс.
+METRICS_ENABLED = True
+METRICS_DIR = os.environ.get(
+    'METRICS_DIR', os.path.join(tempfile.gettempdir(), 'yatube-metrics')
+)
+# Как часто процесс сбрасывает свои метрики в файл, секунд
+METRICS_FLUSH_INTERVAL = 1
+# Токен для заголовка Authorization: Bearer <токен> (bearer_token в Prometheus).
+# За прокси все запросы приходят с его адреса, так что адрес не проверка.
+# Без токена /metrics отвечает 404
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+# Профиль запроса для сотрудников по ?_profile=1 (стеки) или =cprofile
+PROFILE_SAMPLE_INTERVAL = 0.001
+# Сколько строк таблицы cProfile показывать
+PROFILE_LIMIT = 60
+# Каталог, куда сохранять профили; None — не сохранять
+PROFILE_DIR = None
+# Сколько секунд после записи пользователь читает с основной базы
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'primary_pin'
+# Наибольший размер страницы, пачки ids и пачки новых постов в JSON API
+API_MAX_LIMIT = 100
+# Посты авторов с таким числом подписчиков не раскладываются по лентам
+# подписок, а подмешиваются при чтении. Автору, который опустился ниже
+# порога, ленты досыпаются последними TIMELINE_BACKFILL постами; смена
+# самого значения ленты не пересобирает
+FANOUT_MAX_FOLLOWERS = 1000
+# Сколько последних постов автора попадает в ленту новому подписчику
+TIMELINE_BACKFILL = 50
+# Очередь задач в базе (core.queue), воркер — manage.py run_worker.
+# TASKS_EAGER выполняет задачи сразу после коммита, без воркера
+TASKS_EAGER = False
+TASK_MAX_ATTEMPTS = 5
+# Пауза перед повтором упавшей задачи: удваивается до максимума, секунд
+TASK_RETRY_BACKOFF = 10
+TASK_RETRY_BACKOFF_MAX = 60 * 60
+# Через сколько секунд взятая, но не выполненная задача вернётся в очередь
+TASK_VISIBILITY_TIMEOUT = 5 * 60
+# Пауза воркера при пустой очереди, секунд
+TASK_POLL_INTERVAL = 1
+# Уменьшенные копии картинок постов для srcset: вариант -> размеры sorl
+# и параметры get_thumbnail. Их делает воркер, до того шаблон рисует
+# заглушку размера среднего варианта
+POST_IMAGE_VARIANTS = {
+    'feed': {
+        'sizes': ('480x170', '960x339', '1920x678'),
+        'crop': 'center',
+        'upscale': True,
+    },
+    'detail': {
+        'sizes': ('640x640', '960x960', '1920x1920'),
+    },
+}